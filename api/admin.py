@@ -1,6 +1,8 @@
 from django.contrib import admin
+from django.db import transaction
 from django.utils import timezone
-from .models import PersonalData, SkillCategory, Experience, Project, Achievement, BlogPost, AdminOTP, ServiceQuery, ValentineResponse
+from .cache import bump_stamp
+from .models import PersonalData, SkillCategory, Experience, Project, Achievement, BlogPost, AdminOTP, ServiceQuery, ValentineResponse, StoredFile, OutboundEmail
 
 @admin.register(ServiceQuery)
 class ServiceQueryAdmin(admin.ModelAdmin):
@@ -67,12 +69,16 @@ class BlogPostAdmin(admin.ModelAdmin):
     actions = ['publish_posts', 'unpublish_posts']
     
     def publish_posts(self, request, queryset):
-        updated = queryset.update(status='published', published_at=timezone.now())
+        now = timezone.now()
+        updated = queryset.update(status='published', published_at=now, updated_at=now)
+        # update() skips post_save, so stamp the change for conditional GETs ourselves
+        transaction.on_commit(lambda: bump_stamp(BlogPost))
         self.message_user(request, f'{updated} post(s) successfully published.')
     publish_posts.short_description = "Publish selected posts"
     
     def unpublish_posts(self, request, queryset):
-        updated = queryset.update(status='draft', published_at=None)
+        updated = queryset.update(status='draft', published_at=None, updated_at=timezone.now())
+        transaction.on_commit(lambda: bump_stamp(BlogPost))
         self.message_user(request, f'{updated} post(s) unpublished.')
     unpublish_posts.short_description = "Unpublish selected posts"
 
@@ -82,3 +88,24 @@ class ValentineResponseAdmin(admin.ModelAdmin):
     list_display = ('response', 'ip_address', 'location', 'device_model', 'created_at')
     list_filter = ('response', 'created_at')
     readonly_fields = ('created_at',)
+
+@admin.register(StoredFile)
+class StoredFileAdmin(admin.ModelAdmin):
+    list_display = ('name', 'size', 'refcount', 'created_at')
+    search_fields = ('name', 'sha256')
+    readonly_fields = ('name', 'sha256', 'size', 'refcount', 'created_at')
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'to_email', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('to_email', 'subject')
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
+    actions = ['retry_now']
+
+    def retry_now(self, request, queryset):
+        from .outbox import outbox_worker
+        updated = queryset.exclude(status='sent').update(status='pending', next_attempt_at=timezone.now())
+        transaction.on_commit(outbox_worker.wake)
+        self.message_user(request, f'{updated} email(s) queued for another attempt.')
+    retry_now.short_description = "Retry selected emails now"
@@ -1,197 +1,141 @@
 import os
 import random
+import threading
+from functools import lru_cache
 import sib_api_v3_sdk
 from sib_api_v3_sdk.rest import ApiException
 from django.shortcuts import render, redirect
+from django.template.loader import get_template
 from django.contrib.auth import authenticate, login as auth_login
 from django.contrib import messages
 from django.conf import settings
-from .models import AdminOTP
+from .models import AdminOTP, OutboundEmail
+from .outbox import enqueue, PermanentError
 from django.contrib.admin.sites import AdminSite
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+_brevo_api = None
+_brevo_key = None
+_brevo_lock = threading.Lock()
+
+
 def _get_brevo_client():
+    """
+    The process-wide TransactionalEmailsApi. Its ApiClient keeps a pool of
+    BREVO_POOL_SIZE keep-alive connections, so sends after the first skip the TLS handshake.
+    """
+    global _brevo_api, _brevo_key
     api_key = os.getenv('BREVO_API_KEY')
     if not api_key:
         print(f"BREVO_API_KEY not found in environment")
         return None
-    
-    # Debug logging
-    print(f"✓ Brevo API Key loaded (length: {len(api_key)})")
-    print(f"✓ Key preview: {api_key[:15]}...{api_key[-10:]}")
-    
-    configuration = sib_api_v3_sdk.Configuration()
-    configuration.api_key['api-key'] = api_key
-    return sib_api_v3_sdk.TransactionalEmailsApi(sib_api_v3_sdk.ApiClient(configuration))
 
-def send_brevo_otp(email, otp):
-    """
-    Sends OTP using Brevo's Transactional Email API.
-    """
-    api_instance = _get_brevo_client()
-    if not api_instance:
-        return False
+    if _brevo_api is None or _brevo_key != api_key:
+        with _brevo_lock:
+            if _brevo_api is None or _brevo_key != api_key:
+                configuration = sib_api_v3_sdk.Configuration()
+                configuration.api_key['api-key'] = api_key
+                configuration.connection_pool_maxsize = getattr(settings, 'BREVO_POOL_SIZE', 4)
+                _brevo_api = sib_api_v3_sdk.TransactionalEmailsApi(sib_api_v3_sdk.ApiClient(configuration))
+                _brevo_key = api_key
+    return _brevo_api
 
-    sender_email = os.getenv('BREVO_SENDER_EMAIL', 'yugalkishore14@gmail.com')
-    subject = "Admin Login OTP"
-    html_content = f"""
-    <html>
-    <body>
-        <div style="font-family: Arial, sans-serif; max-width: 600px; margin: auto; padding: 20px; border: 1px solid #eee; border-radius: 10px;">
-            <h2 style="color: #417690; text-align: center;">Security Verification</h2>
-            <p>Hello Admin,</p>
-            <p>Your verification code for the portfolio admin panel is:</p>
-            <div style="background: #f4f4f4; padding: 20px; text-align: center; font-size: 2em; letter-spacing: 5px; font-weight: bold; color: #333;">
-                {otp}
-            </div>
-            <p style="color: #666; font-size: 0.9em; margin-top: 20px;">
-                This code will expire in 5 minutes. If you did not request this login, please change your password immediately.
-            </p>
-            <hr style="border: none; border-top: 1px solid #eee; margin: 20px 0;">
-            <p style="text-align: center; color: #999; font-size: 0.8em;">
-                &copy; Yugal Kishor Portfolio Admin
-            </p>
-        </div>
-    </body>
-    </html>
-    """
-    
-    sender = { "name": "Portfolio Admin", "email": sender_email }
-    to = [{"email": email}]
-    
-    send_smtp_email = sib_api_v3_sdk.SendSmtpEmail(
-        to=to,
-        html_content=html_content,
-        sender=sender,
-        subject=subject
-    )
-    
+@lru_cache(maxsize=None)
+def _email_template(name):
+    # Parsed once per process; rendering autoescapes whatever visitors typed
+    return get_template(f'emails/{name}.html')
+
+def render_email(name, context):
+    return _email_template(name).render(context)
+
+def _send(api_instance, send_smtp_email):
     try:
         api_instance.send_transac_email(send_smtp_email)
-        return True
     except ApiException as e:
-        print(f"Exception when calling TransactionalEmailsApi->send_transac_email: {e}")
-        return False
+        # 4xx other than rate limiting means Brevo will never take this message
+        if e.status and 400 <= e.status < 500 and e.status != 429:
+            raise PermanentError(f"Brevo rejected the email ({e.status}): {e.body}") from e
+        raise
 
-def send_brevo_query_emails(query, admin_email):
+def send_outbound_emails(emails):
     """
-    Sends service query emails using Brevo (one to admin, one to requester).
+    Sends queued OutboundEmails from one sender through Brevo's Transactional Email API.
+    Several emails go out as one request, each as a message version with its own
+    recipient, subject and HTML. Raises on failure so the outbox can retry;
+    rejections that won't change raise PermanentError.
     """
     api_instance = _get_brevo_client()
     if not api_instance:
-        return False
+        raise RuntimeError("BREVO_API_KEY not found in environment")
 
     sender_email = os.getenv('BREVO_SENDER_EMAIL', 'yugalkishore14@gmail.com')
-    sender = { "name": "Portfolio System", "email": sender_email }
-
-    # 1. Send to Admin
-    admin_html = f"""
-    <div style="font-family: sans-serif; padding: 20px; border: 1px solid #ddd; border-radius: 10px;">
-        <h2 style="color: #06b6d4;">New Product Query Received</h2>
-        <p><strong>Name:</strong> {query.name}</p>
-        <p><strong>Email:</strong> {query.email}</p>
-        <p><strong>Subject:</strong> {query.subject}</p>
-        <hr/>
-        <p><strong>Message:</strong></p>
-        <p style="white-space: pre-wrap;">{query.message}</p>
-    </div>
-    """
-    
-    admin_email_smtp = sib_api_v3_sdk.SendSmtpEmail(
-        to=[{"email": admin_email}],
-        html_content=admin_html,
-        sender=sender,
-        subject=f"New Product Query: {query.subject}"
+    first = emails[0]
+    send_smtp_email = sib_api_v3_sdk.SendSmtpEmail(
+        to=[{"email": first.to_email}],
+        html_content=first.html_content,
+        sender={"name": first.sender_name, "email": sender_email},
+        subject=first.subject
     )
+    if len(emails) > 1:
+        # Brevo ignores the top-level recipient once message versions are given
+        send_smtp_email.message_versions = [
+            {"to": [{"email": email.to_email}], "subject": email.subject, "htmlContent": email.html_content}
+            for email in emails
+        ]
+    _send(api_instance, send_smtp_email)
 
-    # 2. Send to Requester
-    user_html = f"""
-    <div style="font-family: sans-serif; padding: 20px; border: 1px solid #ddd; border-radius: 10px;">
-        <h2 style="color: #06b6d4;">Transmission Received</h2>
-        <p>Hello {query.name},</p>
-        <p>Thank you for reaching out. I have received your query regarding <strong>'{query.subject}'</strong> and will get back to you shortly.</p>
-        <hr/>
-        <p><strong>Your Message:</strong></p>
-        <p style="color: #666; font-style: italic;">{query.message}</p>
-        <p style="margin-top: 20px;">Best regards,<br/>Yugal Kishor</p>
-    </div>
+def send_outbound_email(email):
+    send_outbound_emails([email])
+
+def send_brevo_otp(email, otp):
     """
-    
-    user_email_smtp = sib_api_v3_sdk.SendSmtpEmail(
-        to=[{"email": query.email}],
-        html_content=user_html,
-        sender=sender,
-        subject=f"Confirmation: Query Received - {query.subject}"
-    )
+    Sends the admin login OTP through Brevo right away. Unlike the other emails it
+    skips the outbox: the admin is waiting for it, and a failure must show on the login page.
+    """
+    if not os.getenv('BREVO_API_KEY'):
+        print(f"BREVO_API_KEY not found in environment")
+        return False
 
+    message = OutboundEmail(
+        kind='otp', to_email=email, subject="Admin Login OTP",
+        html_content=render_email('otp', {'otp': otp}), sender_name="Portfolio Admin",
+    )
     try:
-        # Both returns are ignored or handled together
-        api_instance.send_transac_email(admin_email_smtp)
-        api_instance.send_transac_email(user_email_smtp)
+        send_outbound_email(message)
         return True
-    except ApiException as e:
-        print(f"Brevo API error: {e}")
+    except Exception as e:
+        print(f"Brevo OTP Error: {e}")
         return False
 
-
-def send_valentine_message_email(message, location, device, timestamp):
+def send_brevo_query_emails(query, admin_email):
     """
-    Sends Valentine message to admin via Brevo.
+    Queues the service query emails (one to admin, one to requester) for delivery through Brevo.
+    Both are queued together, so the outbox sends them as one batched request.
     """
-    api_instance = _get_brevo_client()
-    if not api_instance:
-        return False
+    sender_name = "Portfolio System"
+    context = {'query': query}
+    enqueue('service_query_admin', admin_email, f"New Product Query: {query.subject}",
+            render_email('service_query_admin', context), sender_name)
+    enqueue('service_query_user', query.email, f"Confirmation: Query Received - {query.subject}",
+            render_email('service_query_user', context), sender_name)
+    return True
 
-    sender_email = os.getenv('BREVO_SENDER_EMAIL', 'yugalkishore14@gmail.com')
-    sender = { "name": "Valentine's Day 💖", "email": sender_email }
-
-    # Send to Admin
-    admin_html = f"""
-    <div style="font-family: 'Segoe UI', sans-serif; max-width: 600px; margin: auto; padding: 30px; background: linear-gradient(135deg, #FFE5EC 0%, #FFF0F3 100%); border-radius: 20px;">
-        <div style="text-align: center; margin-bottom: 30px;">
-            <h1 style="color: #FF4D6D; font-size: 2.5em; margin: 0;">💖 Valentine Message 💖</h1>
-            <p style="color: #590D22; font-size: 1.1em; margin-top: 10px;">You've received a special message!</p>
-        </div>
-        
-        <div style="background: white; padding: 25px; border-radius: 15px; box-shadow: 0 10px 30px rgba(255, 77, 109, 0.2);">
-            <div style="border-left: 4px solid #FF4D6D; padding-left: 15px; margin-bottom: 20px;">
-                <h3 style="color: #FF4D6D; margin: 0 0 10px 0;">💌 Message:</h3>
-                <p style="font-size: 1.1em; color: #590D22; white-space: pre-wrap; line-height: 1.6;">{message}</p>
-            </div>
-            
-            <hr style="border: none; border-top: 2px solid #FFB3C1; margin: 25px 0;">
-            
-            <div style="color: #666; font-size: 0.9em;">
-                <p style="margin: 8px 0;"><strong>📍 Location:</strong> {location}</p>
-                <p style="margin: 8px 0;"><strong>📱 Device:</strong> {device}</p>
-                <p style="margin: 8px 0;"><strong>🕐 Time:</strong> {timestamp.strftime('%B %d, %Y at %I:%M %p')}</p>
-            </div>
-        </div>
-        
-        <div style="text-align: center; margin-top: 25px; padding-top: 20px; border-top: 1px solid #FFB3C1;">
-            <p style="color: #999; font-size: 0.85em;">
-                ❤️ Happy Valentine's Day! ❤️
-            </p>
-        </div>
-    </div>
-    """
-    
-    admin_email_smtp = sib_api_v3_sdk.SendSmtpEmail(
-        to=[{"email": "yugalkishore14@gmail.com"}],
-        html_content=admin_html,
-        sender=sender,
-        subject="💖 New Valentine's Day Message!"
-    )
 
-    try:
-        api_instance.send_transac_email(admin_email_smtp)
-        return True
-    except ApiException as e:
-        print(f"Brevo API error: {e}")
-        return False
+def send_valentine_message_email(message, location, device, timestamp):
+    """
+    Queues the Valentine message to admin for delivery through Brevo.
+    """
+    admin_html = render_email('valentine', {
+        'message': message,
+        'location': location,
+        'device': device,
+        'time': timestamp.strftime('%B %d, %Y at %I:%M %p'),
+    })
+    enqueue('valentine', "yugalkishore14@gmail.com", "💖 New Valentine's Day Message!", admin_html, "Valentine's Day 💖")
+    return True
 
 def otp_admin_login(self, request, extra_context=None):
     """
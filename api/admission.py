@@ -0,0 +1,174 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from django.conf import settings
+
+
+def client_ip(request):
+    """Client address for a Django request, trusting the first X-Forwarded-For hop like the rest of the API."""
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        return x_forwarded_for.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR')
+
+
+def scope_ip(scope):
+    """Client address for a Channels connection scope."""
+    for name, value in scope.get('headers', []):
+        if name == b'x-forwarded-for':
+            return value.decode('latin-1').split(',')[0].strip()
+    client = scope.get('client')
+    return client[0] if client else None
+
+
+class RateLimiter:
+    """
+    Per-key token buckets: `rate` tokens per second, holding at most `burst`.
+    Only the `max_keys` most recently seen keys are remembered.
+    """
+
+    def __init__(self, rate, burst, max_keys=10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # key -> (tokens, last refill)
+        self.limited = 0
+
+    def allow(self, key):
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            else:
+                self.limited += 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return allowed
+
+    def retry_after(self):
+        """Seconds until an empty bucket holds a token again."""
+        return max(1, round(1 / self.rate)) if self.rate else 60
+
+
+class Overloaded(Exception):
+    """No chat slot was free."""
+
+
+class _LoopWaiter:
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.future = self.loop.create_future()
+
+    def wake(self):
+        def _set():
+            if not self.future.done():
+                self.future.set_result(True)
+        self.loop.call_soon_threadsafe(_set)
+
+
+class ConcurrencyLimiter:
+    """
+    At most `limit` upstream chat calls at once in this process, shared by the
+    REST view and the websocket consumers on the event loop.
+
+    Consumers queue for a slot (up to `max_waiting` of them, for at most
+    `wait_timeout` seconds); anyone beyond that is turned away at once instead
+    of piling up. A released slot is handed straight to the oldest waiter.
+    The REST view never waits: sync views share one thread under Daphne, so
+    blocking there would stall the rest of the API.
+    """
+
+    def __init__(self, limit=8, max_waiting=16, wait_timeout=10):
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._waiters = deque()
+        self.active = 0
+        self.peak = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def _enter(self, waiter):
+        """True if a slot was free, False if the queue is full, None if `waiter` was queued."""
+        with self._lock:
+            if self.active < self.limit:
+                self.active += 1
+                self.admitted += 1
+                self.peak = max(self.peak, self.active)
+                return True
+            if len(self._waiters) >= self.max_waiting:
+                self.rejected += 1
+                return False
+            self._waiters.append(waiter)
+            return None
+
+    def _give_up(self, waiter):
+        with self._lock:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                self.rejected += 1
+                return False
+        # release() handed us the slot just as we timed out
+        return True
+
+    def try_acquire(self):
+        """Takes a free slot without waiting. Returns False if there is none."""
+        with self._lock:
+            if self.active < self.limit and not self._waiters:
+                self.active += 1
+                self.admitted += 1
+                self.peak = max(self.peak, self.active)
+                return True
+            self.rejected += 1
+            return False
+
+    async def acquire_async(self):
+        waiter = _LoopWaiter()
+        entered = self._enter(waiter)
+        if entered is not None:
+            return entered
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.wait_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return self._give_up(waiter)
+        except asyncio.CancelledError:
+            if self._give_up(waiter):
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                # The slot passes to the next waiter, so `active` stays the same
+                self.admitted += 1
+                self._waiters.popleft().wake()
+            else:
+                self.active -= 1
+
+    def stats(self):
+        return {
+            'active': self.active,
+            'waiting': len(self._waiters),
+            'peak': self.peak,
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+        }
+
+
+chat_limiter = ConcurrencyLimiter(
+    limit=getattr(settings, 'CHAT_MAX_CONCURRENT', 8),
+    max_waiting=getattr(settings, 'CHAT_MAX_WAITING', 16),
+    wait_timeout=getattr(settings, 'CHAT_QUEUE_TIMEOUT', 10),
+)
+chat_rate_limiter = RateLimiter(
+    rate=getattr(settings, 'CHAT_RATE_PER_MINUTE', 20) / 60,
+    burst=getattr(settings, 'CHAT_RATE_BURST', 5),
+)
@@ -0,0 +1,77 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+
+_punctuation_re = re.compile(r'[^\w\s]')
+_space_re = re.compile(r'\s+')
+
+
+def normalize_query(query):
+    """'What are his SKILLS??' and 'what are his skills' share one cache entry."""
+    return _space_re.sub(' ', _punctuation_re.sub(' ', query.lower())).strip()
+
+
+class AnswerCache:
+    """
+    In-process LRU of chatbot answers with a TTL.
+
+    Entries are keyed by (prompt kind, prompt context version, normalized query),
+    so anything cached against an old portfolio or resume is simply never looked
+    up again and ages out. Answers are stored as the list of streamed chunks, so
+    the websocket can replay them frame by frame.
+    """
+
+    def __init__(self, max_entries=256, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, kind, version, query):
+        return (kind, version, normalize_query(query))
+
+    def get(self, key):
+        """Returns the cached chunks for `key`, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, chunks):
+        chunks = tuple(chunk for chunk in chunks if chunk)
+        if not chunks or not key[2]:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, chunks)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 3) if total else None,
+            'entries': len(self._entries),
+        }
+
+
+answer_cache = AnswerCache(
+    max_entries=getattr(settings, 'CHAT_ANSWER_CACHE_SIZE', 256),
+    ttl=getattr(settings, 'CHAT_ANSWER_CACHE_TTL', 3600),
+)
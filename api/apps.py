@@ -4,3 +4,17 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+
+def start_background_work():
+    """Called by the ASGI/WSGI entry points, so management commands don't pay for it."""
+    from django.conf import settings
+    from .geoip import warm_up
+    from .outbox import outbox_worker
+    warm_up()
+    if getattr(settings, 'EMAIL_OUTBOX_WORKER', True):
+        # Picks up retries and expired leases left by the previous process without waiting for a new email
+        outbox_worker.wake()
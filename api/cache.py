@@ -0,0 +1,41 @@
+import time
+from django.core.cache import cache
+
+# Change stamps live in Django's cache, which settings.CACHES points at a backend
+# shared by all processes, so a write from any worker, command or shell moves the
+# stamp everyone sees. A stamp is the time (in ns) a model was last changed.
+STAMP_KEY = 'api:stamp:{}'
+
+
+def _stamp_key(model):
+    return STAMP_KEY.format(model._meta.label_lower)
+
+
+def get_stamps(*models):
+    """
+    Returns {model: stamp} for the given models without touching the database.
+    Models that have no stamp yet (cold cache) are stamped with the current time.
+    """
+    keys = {_stamp_key(model): model for model in models}
+    found = cache.get_many(keys.keys())
+    for key in keys.keys() - found.keys():
+        cache.add(key, time.time_ns(), timeout=None)
+        found[key] = cache.get(key)
+    return {model: found[key] for key, model in keys.items()}
+
+
+def get_stamp(model):
+    return get_stamps(model)[model]
+
+
+def bump_stamp(model):
+    """Marks a model as changed. Call after the change has been committed."""
+    stamp = time.time_ns()
+    cache.set(_stamp_key(model), stamp, timeout=None)
+    return stamp
+
+
+def combined_version(*models):
+    """A short version string covering all the given models."""
+    stamps = get_stamps(*models)
+    return '-'.join(format(stamps[model], 'x') for model in models)
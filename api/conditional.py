@@ -0,0 +1,58 @@
+import functools
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from .cache import get_stamps
+
+
+def conditional_get(view_method):
+    """Decorator for extra viewset actions that should honour conditional requests."""
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        handler = functools.partial(view_method, self)
+        return self.conditional_response(request, handler, *args, **kwargs)
+    return wrapper
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag / Last-Modified validators to read-only views.
+
+    Validators are derived from the change stamps of `conditional_models`, so a
+    request carrying If-None-Match or If-Modified-Since gets a 304 before the
+    queryset is evaluated or any serializer runs.
+    """
+    conditional_models = ()
+    # Weak validators for payloads that carry counters we don't stamp (e.g. views)
+    conditional_weak = False
+
+    def get_validators(self, request, *args, **kwargs):
+        """Returns (etag, last_modified) with last_modified as a unix timestamp."""
+        stamps = get_stamps(*self.conditional_models)
+        etag = '-'.join(format(stamps[model], 'x') for model in self.conditional_models)
+        return etag, max(stamps.values()) // 1_000_000_000
+
+    def conditional_response(self, request, handler, *args, **kwargs):
+        etag, last_modified = self.get_validators(request, *args, **kwargs)
+        if etag is not None:
+            etag = quote_etag(etag)
+            if self.conditional_weak:
+                etag = 'W/' + etag
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+
+        if response.status_code in (200, 304):
+            if etag is not None:
+                response.headers['ETag'] = etag
+            if last_modified is not None:
+                response.headers['Last-Modified'] = http_date(last_modified)
+            # Let browsers keep the payload but always revalidate it
+            patch_cache_control(response, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, *args, **kwargs)
@@ -1,64 +1,70 @@
-
-import os
 import json
-import asyncio
-from google import genai
-from google.genai import types
+import threading
 from channels.generic.websocket import AsyncWebsocketConsumer
 from asgiref.sync import sync_to_async
-from dotenv import load_dotenv
-from .models import PersonalData, SkillCategory, Experience, Project, Achievement
+from .admission import Overloaded, chat_limiter, chat_rate_limiter, scope_ip
+from .answer_cache import answer_cache
+from .llm import get_backend
+from .prompt_context import prompt_context, retrieval_enabled
+from .retrieval import retrieval_index, with_context
+from .singleflight import stream_flight
+
+
+class ConnectionStats:
+    """Counts open chat sockets in this process, and how many of them hold a model session."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.sessions = 0
+        self.peak = 0
+
+    def connected(self):
+        with self._lock:
+            self.open += 1
+            self.peak = max(self.peak, self.open)
+
+    def disconnected(self, had_session):
+        with self._lock:
+            self.open -= 1
+            if had_session:
+                self.sessions -= 1
+
+    def session_started(self):
+        with self._lock:
+            self.sessions += 1
+
+    def stats(self):
+        return {'open': self.open, 'with_session': self.sessions, 'idle': self.open - self.sessions, 'peak': self.peak}
+
+
+connection_stats = ConnectionStats()
 
-load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
 class ChatConsumer(AsyncWebsocketConsumer):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.chat = None
-        self.client = genai.Client(api_key=GEMINI_API_KEY)
+        self.context_version = None
+        # Questions asked so far; only the opening one is answered from the shared cache
+        self.turns = 0
 
     async def connect(self):
+        # No queries or model session here: most sockets never send a message
         await self.accept()
-        # Initialize chat session asynchronously
-        await self.initialize_session()
+        connection_stats.connected()
+        self.client_ip = scope_ip(self.scope)
 
     async def disconnect(self, close_code):
-        pass
+        connection_stats.disconnected(self.chat is not None)
 
     async def initialize_session(self):
         try:
-            context = await self.get_portfolio_context()
-            system_prompt = f"""
-            You are Nance, a highly advanced AI assistant for Yugal Kishor.
-            Your persona is professional, intelligent, and helpful, similar to NANCE from Yugal.
-            You have access to Yugal's live portfolio data from the database.
-            
-            PORTFOLIO DATA:
-            {context}
-
-            INSTRUCTIONS:
-            1. You are engaging in a live chat. Keep responses concise, engaging, and professional.
-            2. Use the provided portfolio data to answer questions accurately.
-            3. If a user asks about something not in the data, gently steer them back to Yugal's professional skills and experience.
-            4. Do not hallucinatel; if you don't know, say you don't have that information.
-            """
-            
-            # Use gemini-2.0-flash if available, otherwise gemini-1.5-flash. 
-            # We'll use 2.0-flash as it is the latest generally available/experimental model suited for this.
-            self.chat = self.client.chats.create(
-                model='gemini-2.5-flash', 
-                history=[
-                    types.Content(
-                        role="user", 
-                        parts=[types.Part.from_text(text=system_prompt)]
-                    ),
-                    types.Content(
-                        role="model", 
-                        parts=[types.Part.from_text(text="Hello! I am Jarvis, Yugal's digital assistant. How can I help you learn more about his work today?")]
-                    )
-                ]
-            )
+            # Shared across connections, rebuilt only when the portfolio changes
+            history, self.context_version = await sync_to_async(prompt_context.opening)('portfolio')
+            # The backend (Gemini, or the local fake for load tests) is shared by the whole process
+            self.chat = get_backend().start_chat(history)
+            connection_stats.session_started()
         except Exception as e:
             print(f"Error initializing chat session: {e}")
 
@@ -70,17 +76,54 @@ class ChatConsumer(AsyncWebsocketConsumer):
             if not user_query:
                 return
 
+            if not chat_rate_limiter.allow(self.client_ip):
+                await self.send(text_data=json.dumps({"type": "busy", "reason": "rate_limited"}))
+                return
+
             if not self.chat:
                 await self.initialize_session()
 
-            # Send start signal
-            await self.send(text_data=json.dumps({"type": "start"}))
+            # Follow-ups depend on the conversation so far, so only opening questions are shared
+            cache_key = answer_cache.key('portfolio', self.context_version, user_query) if not self.turns else None
+            cached = answer_cache.get(cache_key) if cache_key else None
+
+            # Sockets asking the same opening question at the same time share one upstream stream.
+            # It's joined straight after the cache check, with no await in between; its leader task takes the slot
+            shared = None
+            if cache_key and not cached:
+                shared = stream_flight.stream(cache_key, lambda: self.generate_shared(user_query, cache_key))
+            needs_slot = not cached and shared is None
+            if needs_slot and not await chat_limiter.acquire_async():
+                await self.send(text_data=json.dumps({"type": "busy", "reason": "overloaded"}))
+                return
 
-            # Run the streaming generation in a separate thread to avoid blocking the event loop
-            await self.stream_response(user_query)
-            
-            # Send end signal
-            await self.send(text_data=json.dumps({"type": "end"}))
+            try:
+                self.turns += 1
+
+                # Send start signal
+                await self.send(text_data=json.dumps({"type": "start"}))
+
+                if cached:
+                    for content in cached:
+                        await self.send(text_data=json.dumps({"type": "chunk", "content": content}))
+                    # Keep the cached turn in the session so follow-ups have their context
+                    self.chat.add_turn(user_query, ''.join(cached))
+                else:
+                    try:
+                        chunks = await self.stream_response(user_query, shared)
+                    except Overloaded:
+                        # Nothing reached the session, so the next question is still an opening one
+                        self.turns -= 1
+                        await self.send(text_data=json.dumps({"type": "busy", "reason": "overloaded"}))
+                        return
+                    if cache_key and chunks:
+                        answer_cache.set(cache_key, chunks)
+
+                # Send end signal
+                await self.send(text_data=json.dumps({"type": "end"}))
+            finally:
+                if needs_slot:
+                    chat_limiter.release()
 
         except Exception as e:
             await self.send(text_data=json.dumps({
@@ -88,87 +131,57 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 'error': str(e)
             }))
 
-    async def stream_response(self, query):
-        def _get_stream():
-            # send_message_stream returns a generator in the new SDK
-            return self.chat.send_message_stream(query)
-
+    async def generate(self, query, record=True):
+        prompt = None
+        if retrieval_enabled():
+            # A follow-up like "tell me more" says little on its own, so search with the previous question too
+            previous = self.chat.turns[-1][0] if self.chat.turns else ''
+            context = await sync_to_async(retrieval_index.context_for)(f"{previous} {query}")
+            prompt = with_context(query, context)
+        async for text in self.chat.stream(query, prompt, record=record):
+            yield text
+
+    async def generate_shared(self, query, cache_key):
+        """The upstream stream behind a shared opening question. Runs as the flight's task, which holds the slot."""
+        if not await chat_limiter.acquire_async():
+            raise Overloaded()
+        try:
+            # The flight before this one may have finished and cached the answer while we waited
+            cached = answer_cache.get(cache_key)
+            if cached:
+                for content in cached:
+                    yield content
+                return
+            async for text in self.generate(query, record=False):
+                yield text
+        finally:
+            chat_limiter.release()
+
+    async def stream_response(self, query, shared=None):
+        """
+        Streams the reply as chunk frames and returns the chunks, or None if generation failed.
+        `shared` is the flight stream for an opening question; without it the socket generates its own.
+        """
         try:
-            # We use sync_to_async because send_message_stream (in the sync client) is blocking/sync
-            response_stream = await sync_to_async(_get_stream)()
-
-            for chunk in response_stream:
-                if chunk.text:
-                    await self.send(text_data=json.dumps({
-                        "type": "chunk",
-                        "content": chunk.text
-                    }))
-                    # Small yield to let loop breathe if needed
-                    await asyncio.sleep(0)
+            stream = shared if shared is not None else self.generate(query)
+
+            # Native async streaming: waiting on the next chunk never blocks other sockets
+            chunks = []
+            async for text in stream:
+                chunks.append(text)
+                await self.send(text_data=json.dumps({
+                    "type": "chunk",
+                    "content": text
+                }))
+            if shared is not None:
+                self.chat.add_turn(query, ''.join(chunks))
+            return chunks
+
+        except Overloaded:
+            raise
                     
         except Exception as e:
              await self.send(text_data=json.dumps({
                 'type': 'error',
                 'error': str(e)
             }))
-
-    @sync_to_async
-    def get_portfolio_context(self):
-        personal_data = PersonalData.objects.first()
-        
-        # Serialize related data
-        skills = []
-        for category in SkillCategory.objects.all():
-            skills.append({
-                "category": category.name,
-                "items": category.items
-            })
-            
-        experiences = []
-        for exp in Experience.objects.all():
-            experiences.append({
-                "company": exp.company,
-                "role": exp.role,
-                "period": exp.period,
-                "description": exp.description,
-                "achievements": exp.achievements
-            })
-            
-        projects = []
-        for proj in Project.objects.all():
-            projects.append({
-                "title": proj.title,
-                "category": proj.category,
-                "description": proj.description,
-                "tech": proj.tech,
-                "link": proj.link
-            })
-            
-        achievements = []
-        for ach in Achievement.objects.all():
-            achievements.append({
-                "label": ach.label,
-                "metric": ach.metric,
-                "description": ach.description
-            })
-
-        pd_dict = {
-            "name": personal_data.name if personal_data else "Yugal Kishor",
-            "role": personal_data.role if personal_data else "N/A",
-            "about": personal_data.about_description if personal_data else [],
-            "mission": personal_data.mission if personal_data else "",
-            "values": personal_data.about_values if personal_data else [],
-            "contact": {
-                "email": personal_data.email if personal_data else "",
-                "linkedin": personal_data.linkedin if personal_data else "",
-                "github": personal_data.github if personal_data else ""
-            }
-        } if personal_data else {}
-
-        context_str = f"Personal Info: {json.dumps(pd_dict)}\n"
-        context_str += f"Skills: {json.dumps(skills)}\n"
-        context_str += f"Experience: {json.dumps(experiences)}\n"
-        context_str += f"Projects: {json.dumps(projects)}\n"
-        context_str += f"Achievements: {json.dumps(achievements)}"
-        
-        return context_str
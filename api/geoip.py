@@ -0,0 +1,124 @@
+import csv
+import gzip
+import ipaddress
+import threading
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from django.conf import settings
+
+UNKNOWN = "Unknown"
+_IPV4_MAPPED = int(ipaddress.IPv6Address('::ffff:0:0'))
+
+
+def _address(value):
+    """An address column as an integer; the CSV may hold integers or dotted/colon notation."""
+    value = value.strip()
+    return int(value) if value.isdigit() else int(ipaddress.ip_address(value))
+
+
+class GeoIPDatabase:
+    """
+    Offline city lookup over a sorted table of address ranges, read from a CSV in the
+    IP2Location LITE DB3 layout (ip_from, ip_to, country_code, country_name, region, city;
+    optionally gzipped). Addresses may be integers or IP strings.
+
+    Each address family is three parallel arrays: range starts, range ends and an index
+    into a deduplicated list of location strings, so a lookup is one bisect.
+    IPv4 ranges in an IPv6 file (::ffff:a.b.c.d) are folded into the IPv4 table.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.ranges = {4: (array('L'), array('L'), array('L')), 6: ([], [], array('L'))}
+        self.locations = []
+
+    def load(self):
+        rows = {4: [], 6: []}
+        locations, location_ids = [], {}
+        opener = gzip.open if str(self.path).endswith('.gz') else open
+        with opener(self.path, 'rt', encoding='utf-8', newline='') as f:
+            for row in csv.reader(f):
+                if len(row) < 6:
+                    continue
+                try:
+                    start, end = _address(row[0]), _address(row[1])
+                except ValueError:
+                    continue  # header line
+                if row[3] in ('', '-'):
+                    continue
+                location = f"{row[5]}, {row[4]}, {row[3]}"
+                location_id = location_ids.setdefault(location, len(locations))
+                if location_id == len(locations):
+                    locations.append(location)
+                if start >= _IPV4_MAPPED and end <= _IPV4_MAPPED + 0xFFFFFFFF:
+                    start, end = start - _IPV4_MAPPED, end - _IPV4_MAPPED
+                    rows[4].append((start, end, location_id))
+                elif end <= 0xFFFFFFFF and ':' not in row[0]:
+                    rows[4].append((start, end, location_id))
+                else:
+                    rows[6].append((start, end, location_id))
+
+        for version, family in rows.items():
+            family.sort()
+            starts, ends, ids = self.ranges[version]
+            for start, end, location_id in family:
+                starts.append(start)
+                ends.append(end)
+                ids.append(location_id)
+        self.locations = locations
+        return self
+
+    def __len__(self):
+        return sum(len(starts) for starts, _, _ in self.ranges.values())
+
+    def lookup(self, ip):
+        """"city, region, country" for `ip`, or "Unknown" if it isn't covered (private ranges, bad input)."""
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return UNKNOWN
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        starts, ends, ids = self.ranges[address.version]
+        number = int(address)
+        i = bisect_right(starts, number) - 1
+        if i < 0 or number > ends[i]:
+            return UNKNOWN
+        return self.locations[ids[i]]
+
+
+_database = None
+_database_lock = threading.Lock()
+
+
+def get_database():
+    """The process-wide database from GEOIP_DATABASE, loaded on first use. Empty if the file is missing."""
+    global _database
+    if _database is None:
+        with _database_lock:
+            if _database is None:
+                path = getattr(settings, 'GEOIP_DATABASE', None)
+                try:
+                    _database = GeoIPDatabase(path).load()
+                except (OSError, TypeError) as e:
+                    print(f"GeoIP database unavailable ({path}): {e}")
+                    _database = GeoIPDatabase(path)
+    return _database
+
+
+def warm_up():
+    """Loads the table on a background thread at server start, so no request waits for it."""
+    threading.Thread(target=get_database, name='geoip-load', daemon=True).start()
+
+
+def locate(ip):
+    """Location string for a client address, with no network I/O. "Unknown" while the table is still loading."""
+    if not ip or (_database is None and _database_lock.locked()):
+        return UNKNOWN
+    return _lookup(ip)
+
+
+@lru_cache(maxsize=getattr(settings, 'GEOIP_CACHE_SIZE', 4096))
+def _lookup(ip):
+    return get_database().lookup(ip)
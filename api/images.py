@@ -0,0 +1,239 @@
+import io
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from PIL import Image, ImageOps
+from ckeditor_uploader.backends import PillowBackend
+from ckeditor_uploader.utils import storage as upload_storage
+
+# Widths generated for BlogPost.featured_image, never wider than the upload itself
+FEATURED_WIDTHS = (320, 640, 1024, 1600)
+# format -> (file extension, Pillow save options)
+RENDITION_FORMATS = {
+    'webp': ('webp', {'quality': 80, 'method': 6}),
+    'jpeg': ('jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Process-wide worker pool for image work, so uploads never wait on Pillow."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'IMAGE_WORKERS', 2),
+                    thread_name_prefix='image-worker',
+                )
+    return _executor
+
+
+def submit(fn, *args):
+    """Runs fn in the image pool, logging failures and releasing the worker's DB connection."""
+    def _run():
+        try:
+            return fn(*args)
+        except Exception as e:
+            print(f"Image worker error in {fn.__name__}: {e}")
+        finally:
+            close_old_connections()
+    return get_executor().submit(_run)
+
+
+def open_image(fp):
+    image = Image.open(fp)
+    # Phones store rotation in EXIF, bake it in before the metadata is dropped
+    return ImageOps.exif_transpose(image)
+
+
+def encode(image, fmt):
+    """Encodes an image as `fmt` without metadata and returns the bytes."""
+    ext, options = RENDITION_FORMATS[fmt]
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        else:
+            image = image.convert('RGB')
+    elif fmt == 'webp' and image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() or image.mode == 'P' else 'RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt.upper(), **options)
+    return buffer.getvalue()
+
+
+def resize_to_width(image, width):
+    if image.width <= width:
+        return image
+    height = round(image.height * width / image.width)
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def save_file(name, data, storage=default_storage):
+    # Overwrite in place so derivative names stay stable
+    if storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, ContentFile(data))
+
+
+def build_renditions(name, widths=FEATURED_WIDTHS):
+    """
+    Writes resized WebP/JPEG copies of the stored image `name` next to it and
+    returns {'source': name, 'width': ..., 'webp': {width: name}, 'jpeg': {width: name}}.
+    """
+    stem, _ = os.path.splitext(name)
+    with default_storage.open(name, 'rb') as f:
+        image = open_image(f)
+        image.load()
+
+    renditions = {'source': name, 'width': image.width}
+    targets = [w for w in widths if w < image.width] + [min(image.width, max(widths))]
+    for fmt, (ext, _) in RENDITION_FORMATS.items():
+        renditions[fmt] = {}
+        for width in sorted(set(targets)):
+            data = encode(resize_to_width(image, width), fmt)
+            renditions[fmt][str(width)] = save_file(f'{stem}_{width}w.{ext}', data)
+    return renditions
+
+
+def delete_renditions(renditions):
+    from .models import BlogPost
+
+    source = (renditions or {}).get('source')
+    # Identical uploads share one stored file, and with it one set of renditions
+    if source and BlogPost.objects.filter(featured_image=source).exists():
+        return
+    for fmt in RENDITION_FORMATS:
+        for name in (renditions or {}).get(fmt, {}).values():
+            if default_storage.exists(name):
+                default_storage.delete(name)
+
+
+def generate_featured_renditions(post_id):
+    """Worker task: builds renditions for a post's current featured image."""
+    from .cache import bump_stamp
+    from .models import BlogPost
+
+    post = BlogPost.objects.filter(pk=post_id).only('featured_image', 'featured_image_renditions').first()
+    if post is None or not post.featured_image:
+        return
+    old = post.featured_image_renditions or {}
+    name = post.featured_image.name
+    shared = (
+        BlogPost.objects.filter(featured_image=name, featured_image_renditions__source=name)
+        .exclude(pk=post_id).values_list('featured_image_renditions', flat=True).first()
+    )
+    renditions = shared or build_renditions(name)
+    # Only store if the image wasn't replaced while we were working; update() skips post_save
+    updated = BlogPost.objects.filter(pk=post_id, featured_image=post.featured_image.name).update(
+        featured_image_renditions=renditions
+    )
+    if not updated:
+        if not shared:
+            delete_renditions(renditions)
+        return
+    if old.get('source') != renditions['source']:
+        delete_renditions(old)
+    bump_stamp(BlogPost)
+
+
+# CKEditor uploads: images are re-encoded to WebP in the background and posts are pointed at the copy
+UPLOAD_IMAGE_EXTENSIONS = ('png', 'jpg', 'jpeg', 'gif', 'bmp', 'tif', 'tiff')
+
+
+def optimized_name(name):
+    """Where the optimized WebP copy of an upload lives."""
+    return f'{os.path.splitext(name)[0]}_opt.webp'
+
+
+def upload_url_re():
+    prefix = re.escape(upload_storage.url(settings.CKEDITOR_UPLOAD_PATH))
+    extensions = '|'.join(UPLOAD_IMAGE_EXTENSIONS)
+    return re.compile(rf'{prefix}[^"\'\s>]+?\.(?:{extensions})(?=["\'\s>?#])', re.IGNORECASE)
+
+
+def rewrite_upload_urls(html):
+    """Points <img> URLs of CKEditor uploads at their optimized copy, where one exists."""
+    if not html:
+        return html
+    media_url = upload_storage.url('')
+
+    def _replace(match):
+        url = match.group(0)
+        name = url[len(media_url):]
+        webp = optimized_name(name)
+        return upload_storage.url(webp) if upload_storage.exists(webp) else url
+
+    return upload_url_re().sub(_replace, html)
+
+
+def rewrite_post_uploads(post_id):
+    """
+    Worker task, run after a post is committed: swaps in copies optimized while the post was
+    being saved, which neither the pre_save rewrite nor optimize_upload's query could see.
+    """
+    from .cache import bump_stamp
+    from .models import BlogPost
+
+    post = BlogPost.objects.filter(pk=post_id).only('pk', 'content').first()
+    if post is None:
+        return
+    content = rewrite_upload_urls(post.content)
+    if content != post.content:
+        # Only if nobody saved the post again meanwhile; update() skips the save signals
+        if BlogPost.objects.filter(pk=post_id, content=post.content).update(content=content):
+            bump_stamp(BlogPost)
+
+
+def optimize_upload(name):
+    """
+    Worker task: downscales an uploaded image to UPLOAD_IMAGE_MAX_WIDTH, drops its metadata,
+    stores it as WebP and rewrites posts that already reference the original.
+    The original is kept as is when the WebP copy wouldn't be smaller.
+    """
+    from .cache import bump_stamp
+    from .models import BlogPost
+
+    with upload_storage.open(name, 'rb') as f:
+        image = Image.open(f)
+        if getattr(image, 'is_animated', False):
+            return
+        image = ImageOps.exif_transpose(image)
+
+    max_width = getattr(settings, 'UPLOAD_IMAGE_MAX_WIDTH', 1600)
+    data = encode(resize_to_width(image, max_width), 'webp')
+    if len(data) >= upload_storage.size(name):
+        return
+    target = save_file(optimized_name(name), data, upload_storage)
+
+    original_url, optimized_url = upload_storage.url(name), upload_storage.url(target)
+    changed = False
+    for post in BlogPost.objects.filter(content__contains=original_url).only('pk', 'content'):
+        # update() so we don't re-run save signals for a URL swap. Only if the content is still what
+        # we read; a post saved meanwhile got the new URL from its own pre_save or post-commit rewrite
+        changed |= bool(BlogPost.objects.filter(pk=post.pk, content=post.content).update(
+            content=post.content.replace(original_url, optimized_url)
+        ))
+    if changed:
+        bump_stamp(BlogPost)
+
+
+class OptimizingImageBackend(PillowBackend):
+    """CKEditor image backend that queues uploads for WebP optimization after saving them."""
+
+    def save_as(self, filepath):
+        saved_path = super().save_as(filepath)
+        ext = os.path.splitext(saved_path)[1].lower().lstrip('.')
+        if self.is_image and ext in UPLOAD_IMAGE_EXTENSIONS:
+            submit(optimize_upload, saved_path)
+        return saved_path
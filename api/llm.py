@@ -0,0 +1,262 @@
+import abc
+import asyncio
+import os
+import random
+import threading
+import time
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# Conversation history is kept backend-neutral as a list of (role, text) pairs,
+# where role is "user" or "model".
+
+
+class LLMError(Exception):
+    pass
+
+
+def estimate_tokens(text):
+    # Roughly 4 characters per token for English; close enough for a budget
+    return len(text) // 4 + 1
+
+
+class HistoryMetrics:
+    """Process-wide view of how big chat histories get and how often they are trimmed."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.history_tokens = 0
+        self.max_history_tokens = 0
+        self.trimmed_turns = 0
+        self.compactions = 0
+
+    def record(self, tokens):
+        with self._lock:
+            self.requests += 1
+            self.history_tokens += tokens
+            self.max_history_tokens = max(self.max_history_tokens, tokens)
+
+    def trimmed(self, turns, compacted):
+        with self._lock:
+            self.trimmed_turns += turns
+            self.compactions += 1 if compacted else 0
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'avg_history_tokens': round(self.history_tokens / self.requests) if self.requests else None,
+            'max_history_tokens': self.max_history_tokens,
+            'trimmed_turns': self.trimmed_turns,
+            'compactions': self.compactions,
+        }
+
+
+history_metrics = HistoryMetrics()
+
+
+class HistoryBudget:
+    """
+    Keeps a session's turns within `max_tokens`, the opening turns (system prompt) not included.
+
+    With the "window" policy the oldest turns are dropped. With "compact" they are
+    folded into a short note listing the questions asked earlier, so the model still
+    knows what was covered without paying for the old answers.
+    """
+
+    def __init__(self, policy='window', max_tokens=3000, summary_tokens=300):
+        if policy not in ('window', 'compact'):
+            raise ValueError(f"Unknown chat history policy: {policy}")
+        self.policy = policy
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+
+    def apply(self, session):
+        dropped = []
+        # Always keep the latest turn, even if it alone is over budget
+        while len(session.turns) > 1 and session.history_tokens() > self.max_tokens:
+            dropped.append(session.turns.pop(0))
+        if not dropped:
+            return
+        if self.policy == 'compact':
+            questions = session.earlier_questions + [question for question, _ in dropped]
+            # Newest questions matter most, drop the oldest ones from the note first
+            while len(questions) > 1 and estimate_tokens(' | '.join(questions)) > self.summary_tokens:
+                questions.pop(0)
+            session.earlier_questions = questions
+        history_metrics.trimmed(len(dropped), self.policy == 'compact')
+
+
+class ChatSession(abc.ABC):
+    """
+    A conversation: pinned opening turns, a compacted note of older questions and the recent turns.
+    Backends implement generate(contents) as an async iterator of text chunks.
+    """
+
+    def __init__(self, backend, opening, budget=None):
+        self.backend = backend
+        self.opening = tuple(opening)
+        self.turns = []
+        self.earlier_questions = []
+        self.budget = budget or get_history_budget()
+
+    def summary_turns(self):
+        if not self.earlier_questions:
+            return []
+        note = "Earlier in this conversation the visitor asked: " + ' | '.join(self.earlier_questions)
+        return [('user', note), ('model', "Understood, I remember those questions.")]
+
+    def history_tokens(self):
+        """Tokens in everything after the pinned opening turns."""
+        turns = self.summary_turns() + [('', text) for turn in self.turns for text in turn]
+        return sum(estimate_tokens(text) for _, text in turns)
+
+    def contents(self, message):
+        history = list(self.opening) + self.summary_turns()
+        for question, answer in self.turns:
+            history += [('user', question), ('model', answer)]
+        return history + [('user', message)]
+
+    async def stream(self, message, prompt=None, record=True):
+        """
+        Yields the reply to `message`. `prompt` is what the model is actually sent for this turn
+        (e.g. the question with retrieved excerpts); only `message` is kept in the history.
+        With record=False the caller adds the turn itself (see add_turn).
+        """
+        history_metrics.record(self.history_tokens())
+        chunks = []
+        async for text in self.generate(self.contents(prompt or message)):
+            chunks.append(text)
+            yield text
+        if record:
+            self.add_turn(message, ''.join(chunks))
+
+    def add_turn(self, message, answer):
+        """Records a finished turn, including ones answered elsewhere (e.g. from a cache)."""
+        self.turns.append((message, answer))
+        self.budget.apply(self)
+
+    def stats(self):
+        return {
+            'turns': len(self.turns),
+            'earlier_questions': len(self.earlier_questions),
+            'history_tokens': self.history_tokens(),
+        }
+
+    @abc.abstractmethod
+    async def generate(self, contents):
+        """Yields the reply to `contents` (the full turn list) as text chunks."""
+
+
+class GeminiBackend:
+    """Google Gemini through the google-genai SDK. One client per process, created on first use."""
+
+    def __init__(self, model='gemini-2.5-flash', api_key=None):
+        self.model = model
+        self.api_key = api_key or os.getenv("GEMINI_API_KEY")
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            from google import genai
+            with self._lock:
+                if self._client is None:
+                    self._client = genai.Client(api_key=self.api_key)
+        return self._client
+
+    def _contents(self, history):
+        from google.genai import types
+        return [types.Content(role=role, parts=[types.Part.from_text(text=text)]) for role, text in history]
+
+    def send(self, history, message):
+        """Blocking one-shot reply to `message` after `history`."""
+        response = self.client.models.generate_content(
+            model=self.model, contents=self._contents(list(history) + [('user', message)])
+        )
+        return response.text or ''
+
+    def start_chat(self, history):
+        return GeminiChat(self, history)
+
+
+class GeminiChat(ChatSession):
+    async def generate(self, contents):
+        # Native async streaming: waiting on the next chunk never blocks the event loop
+        response_stream = await self.backend.client.aio.models.generate_content_stream(
+            model=self.backend.model, contents=self.backend._contents(contents)
+        )
+        async for chunk in response_stream:
+            if chunk.text:
+                yield chunk.text
+
+
+class FakeBackend:
+    """
+    Local stand-in for load tests and benchmarks: no network, no key.
+
+    Replies wait `ttft` seconds for the first token, then emit words at
+    `tokens_per_second`. `failure_rate` is the share of requests that raise LLMError.
+    """
+
+    def __init__(self, ttft=0.5, tokens_per_second=50, failure_rate=0.0, reply_tokens=60):
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.failure_rate = failure_rate
+        self.reply_tokens = reply_tokens
+
+    def tokens(self, message):
+        words = message.split() or ['...']
+        return [f"{words[i % len(words)]} " for i in range(self.reply_tokens)]
+
+    def _fail(self):
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise LLMError("Fake backend failure")
+
+    def send(self, history, message):
+        self._fail()
+        tokens = self.tokens(message)
+        time.sleep(self.ttft + len(tokens) / self.tokens_per_second)
+        return ''.join(tokens)
+
+    def start_chat(self, history):
+        return FakeChat(self, history)
+
+
+class FakeChat(ChatSession):
+    async def generate(self, contents):
+        backend = self.backend
+        backend._fail()
+        await asyncio.sleep(backend.ttft)
+        for token in backend.tokens(contents[-1][1]):
+            yield token
+            await asyncio.sleep(1 / backend.tokens_per_second)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """The process-wide backend named by CHAT_BACKEND, built with CHAT_BACKEND_OPTIONS."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend_class = import_string(getattr(settings, 'CHAT_BACKEND', 'api.llm.GeminiBackend'))
+                _backend = backend_class(**getattr(settings, 'CHAT_BACKEND_OPTIONS', {}))
+    return _backend
+
+
+def set_backend(backend):
+    """Swaps the process-wide backend, e.g. for a benchmark run."""
+    global _backend
+    _backend = backend
+
+
+def get_history_budget():
+    return HistoryBudget(
+        policy=getattr(settings, 'CHAT_HISTORY_POLICY', 'window'),
+        max_tokens=getattr(settings, 'CHAT_HISTORY_MAX_TOKENS', 3000),
+    )
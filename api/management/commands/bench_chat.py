@@ -0,0 +1,152 @@
+import asyncio
+import json
+import time
+import tracemalloc
+from django.core.management.base import BaseCommand
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from api.admission import chat_limiter, chat_rate_limiter
+from api.answer_cache import answer_cache
+from api.consumers import connection_stats
+from api.llm import FakeBackend, get_backend, set_backend, history_metrics
+from api.prompt_context import prompt_context
+from api.routing import websocket_urlpatterns
+from api.singleflight import flight_stats
+
+
+def percentile(values, pct):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def connect_as(application, number):
+    # A distinct client address per session, so the per-IP rate limit applies as it would to real visitors
+    address = f"10.{number // 65536 % 256}.{number // 256 % 256}.{number % 256}"
+    return WebsocketCommunicator(application, '/ws/chat/', headers=[(b'x-forwarded-for', address.encode())])
+
+
+class Command(BaseCommand):
+    help = "Opens N simultaneous ws/chat/ sessions in-process and reports time-to-first-chunk and reply latency"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions', type=int, default=100, help='Simultaneous websocket sessions')
+        parser.add_argument('--messages', type=int, default=2, help='Questions asked per session')
+        parser.add_argument('--real', action='store_true', help='Use the configured CHAT_BACKEND instead of the fake')
+        parser.add_argument('--ttft', type=float, default=0.5, help='Fake backend time to first token (s)')
+        parser.add_argument('--tokens-per-second', type=float, default=50, help='Fake backend generation speed')
+        parser.add_argument('--reply-tokens', type=int, default=60, help='Fake backend tokens per reply')
+        parser.add_argument('--failure-rate', type=float, default=0.0, help='Fake backend share of failed replies')
+        parser.add_argument('--max-concurrent', type=int, help='Override CHAT_MAX_CONCURRENT for this run')
+        parser.add_argument('--max-waiting', type=int, help='Override CHAT_MAX_WAITING for this run')
+        parser.add_argument('--no-rate-limit', action='store_true', help='Disable the per-IP chat rate limit')
+        parser.add_argument('--memory', action='store_true', help='Measure memory per idle socket and per chat session instead')
+        parser.add_argument('--same-question', action='store_true', help='Every session asks the same questions (exercises the answer cache)')
+
+    def handle(self, *args, **options):
+        if not options['real']:
+            set_backend(FakeBackend(
+                ttft=options['ttft'], tokens_per_second=options['tokens_per_second'],
+                failure_rate=options['failure_rate'], reply_tokens=options['reply_tokens'],
+            ))
+        answer_cache.clear()
+        if options['max_concurrent']:
+            chat_limiter.limit = options['max_concurrent']
+        if options['max_waiting'] is not None:
+            chat_limiter.max_waiting = options['max_waiting']
+        if options['no_rate_limit']:
+            chat_rate_limiter.rate = chat_rate_limiter.burst = 1e9
+        self.stdout.write(
+            f"Backend: {type(get_backend()).__name__}, {options['sessions']} sessions x {options['messages']} messages"
+        )
+        if options['memory']:
+            return asyncio.run(self.measure_memory(options))
+        started = time.monotonic()
+        results = asyncio.run(self.run(options))
+        elapsed = time.monotonic() - started
+
+        answered = [r for r in results if r[0] == 'ok']
+        first_chunk = [r[1] for r in answered]
+        total = [r[2] for r in answered]
+        errors = sum(1 for r in results if r[0] == 'error')
+        busy = sum(1 for r in results if r[0] == 'busy')
+        self.stdout.write(
+            f"{len(results)} questions in {elapsed:.2f}s, {len(answered)} answered, {errors} errors, "
+            f"{busy} turned away busy, {len(answered) / elapsed:.1f} replies/s"
+        )
+        for label, values in (('first chunk', first_chunk), ('full reply', total)):
+            self.stdout.write(
+                f"{label:<12} p50 {percentile(values, 50) * 1000:8.1f} ms  p90 {percentile(values, 90) * 1000:8.1f} ms  "
+                f"p99 {percentile(values, 99) * 1000:8.1f} ms  max {percentile(values, 100) * 1000:8.1f} ms"
+            )
+        self.stdout.write(f"history: {history_metrics.stats()}")
+        self.stdout.write(f"prompt context: {prompt_context.stats()}")
+        self.stdout.write(f"answer cache: {answer_cache.stats()}")
+        self.stdout.write(f"coalescing: {flight_stats.stats()}")
+        self.stdout.write(f"admission: {chat_limiter.stats()}")
+
+    async def run(self, options):
+        application = URLRouter(websocket_urlpatterns)
+        sessions = [self.session(application, i, options) for i in range(options['sessions'])]
+        results = []
+        for session in await asyncio.gather(*sessions):
+            results.extend(session)
+        return results
+
+    async def session(self, application, number, options):
+        """Returns [(status, seconds to first chunk, seconds to end)] for one connection; status is ok, error or busy."""
+        communicator = connect_as(application, number)
+        connected, _ = await communicator.connect()
+        if not connected:
+            return [('error', None, None)] * options['messages']
+        results = []
+        for i in range(options['messages']):
+            question = f"Tell me about his skills {i}" if options['same_question'] else f"Session {number} question {i}"
+            sent = time.monotonic()
+            await communicator.send_to(text_data=json.dumps({'message': question}))
+            first = None
+            outcome = 'ok'
+            while True:
+                frame = json.loads(await communicator.receive_from(timeout=120))
+                if frame['type'] == 'chunk' and first is None:
+                    first = time.monotonic() - sent
+                elif frame['type'] == 'error':
+                    outcome = 'error'
+                elif frame['type'] == 'busy':
+                    outcome = 'busy'
+                    break
+                elif frame['type'] == 'end':
+                    break
+            results.append((outcome, first, time.monotonic() - sent))
+        await communicator.disconnect()
+        return results
+
+    async def measure_memory(self, options):
+        """Python heap growth per connected-but-idle socket, then per socket with a model session."""
+        application = URLRouter(websocket_urlpatterns)
+        count = options['sessions']
+        # Warm the prompt context and imports so they don't count against the first socket
+        await self.session(application, -1, {**options, 'messages': 1})
+
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        communicators = [connect_as(application, i) for i in range(count)]
+        await asyncio.gather(*(c.connect() for c in communicators))
+        idle = tracemalloc.get_traced_memory()[0]
+        self.stdout.write(f"{connection_stats.stats()}")
+        self.stdout.write(f"idle socket      {(idle - baseline) / count / 1024:8.1f} KiB each")
+
+        async def ask(communicator, number):
+            await communicator.send_to(text_data=json.dumps({'message': f"Session {number} hello"}))
+            # Sockets turned away by the limiter get a busy frame and never an end
+            while json.loads(await communicator.receive_from(timeout=120))['type'] not in ('end', 'busy'):
+                pass
+
+        await asyncio.gather(*(ask(c, i) for i, c in enumerate(communicators)))
+        active = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        self.stdout.write(f"{connection_stats.stats()}")
+        self.stdout.write(f"with session     {(active - baseline) / count / 1024:8.1f} KiB each")
+        # Python heap only, including the in-process test client's queues; Daphne adds its own socket buffers
+        await asyncio.gather(*(c.disconnect() for c in communicators))
@@ -0,0 +1,70 @@
+import timeit
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from api.models import PersonalData, SkillCategory, Experience, Project, Achievement, BlogPost
+from api.renderers import FastJSONRenderer, JSON_BACKEND
+from api.serializers import (
+    PersonalDataSerializer, SkillCategorySerializer, ExperienceSerializer,
+    ProjectSerializer, AchievementSerializer, BlogPostListSerializer
+)
+
+
+class Command(BaseCommand):
+    help = "Compares DRF's stdlib JSONRenderer with FastJSONRenderer on blog list and portfolio payloads"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=200, help='Posts in the blog list payload')
+        parser.add_argument('--number', type=int, default=200, help='Renders per timing run')
+
+    def handle(self, *args, **options):
+        # Unsaved instances, so the benchmark needs no database rows
+        now = timezone.now()
+        posts = [
+            BlogPost(
+                id=i, title=f'Post {i}: Scaling Django on a budget', slug=f'post-{i}',
+                excerpt='Notes on caching, query plans and a few surprises along the way. ' * 3,
+                tags=['Django', 'Performance', 'MERN + AI'], category='Technology',
+                views=i * 7, created_at=now - timedelta(days=i), published_at=now - timedelta(days=i),
+            )
+            for i in range(options['posts'])
+        ]
+        blog_list = BlogPostListSerializer(posts, many=True).data
+
+        portfolio = {
+            'personal_data': PersonalDataSerializer(PersonalData(
+                name='Yugal Kishor', role='Full Stack Developer', tagline='Builder', mission='Ship it',
+                about_title='About', about_description=['Paragraph one.', 'Paragraph two.'],
+                about_values=['Craft', 'Speed'], email='me@example.com',
+            )).data,
+            'skills': SkillCategorySerializer(
+                [SkillCategory(name=f'Category {i}', items=[f'Skill {j}' for j in range(12)]) for i in range(8)],
+                many=True).data,
+            'experience': ExperienceSerializer(
+                [Experience(id=i, company=f'Company {i}', role='Engineer', period='2022 - 2024', color='cyan',
+                            description='Built things. ' * 10, achievements=['Did X', 'Did Y', 'Did Z'])
+                 for i in range(6)],
+                many=True).data,
+            'projects': ProjectSerializer(
+                [Project(id=i, title=f'Project {i}', category='Web', description='A project. ' * 12,
+                         tech=['Django', 'React', 'Postgres'], link='https://example.com')
+                 for i in range(12)],
+                many=True).data,
+            'achievements': AchievementSerializer(
+                [Achievement(id=i, metric=f'{i * 10}%', label=f'Metric {i}', description='Improvement. ' * 4)
+                 for i in range(6)],
+                many=True).data,
+        }
+
+        stdlib, fast = JSONRenderer(), FastJSONRenderer()
+        number = options['number']
+        self.stdout.write(f"Backend: {JSON_BACKEND}, {number} renders per run, best of 5")
+        for name, payload in (('blog list', blog_list), ('portfolio', portfolio)):
+            size = len(fast.render(payload))
+            base = min(timeit.repeat(lambda: stdlib.render(payload), number=number, repeat=5)) / number
+            best = min(timeit.repeat(lambda: fast.render(payload), number=number, repeat=5)) / number
+            self.stdout.write(
+                f"{name:<10} {size / 1024:7.1f} KiB  stdlib {base * 1e6:8.1f} us  "
+                f"{JSON_BACKEND} {best * 1e6:8.1f} us  x{base / best:.1f}"
+            )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from api.images import generate_featured_renditions
+from api.models import BlogPost
+
+
+class Command(BaseCommand):
+    help = "Generates missing or outdated featured image renditions for blog posts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rebuild renditions that look up to date')
+
+    def handle(self, *args, **options):
+        built = 0
+        for post in BlogPost.objects.exclude(featured_image='').exclude(featured_image__isnull=True):
+            renditions = post.featured_image_renditions or {}
+            if not options['force'] and renditions.get('source') == post.featured_image.name:
+                continue
+            try:
+                generate_featured_renditions(post.pk)
+                built += 1
+            except Exception as e:
+                self.stderr.write(f"{post.slug}: {e}")
+        self.stdout.write(self.style.SUCCESS(f"Built renditions for {built} post(s)"))
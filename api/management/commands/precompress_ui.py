@@ -0,0 +1,60 @@
+import gzip
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from config.spa import COMPRESSIBLE_EXTENSIONS
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class Command(BaseCommand):
+    help = "Writes .gz and .br siblings for every text asset in the Next.js export (ui/out)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=str(settings.BASE_DIR / 'ui/out'), help='Export directory')
+        parser.add_argument('--min-size', type=int, default=512, help='Skip files smaller than this many bytes')
+        parser.add_argument('--force', action='store_true', help='Recompress files that are already up to date')
+
+    def handle(self, *args, **options):
+        compressors = [('.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli:
+            compressors.append(('.br', lambda data: brotli.compress(data, quality=11)))
+        else:
+            self.stderr.write("brotli is not installed, writing .gz files only")
+
+        written = skipped = saved = 0
+        for dirpath, dirnames, filenames in os.walk(options['path']):
+            for name in filenames:
+                if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                    continue
+                source = os.path.join(dirpath, name)
+                stat = os.stat(source)
+                if stat.st_size < options['min_size']:
+                    continue
+
+                data = None
+                for suffix, compress in compressors:
+                    target = source + suffix
+                    if not options['force'] and os.path.exists(target) and os.stat(target).st_mtime >= stat.st_mtime:
+                        skipped += 1
+                        continue
+                    if data is None:
+                        with open(source, 'rb') as f:
+                            data = f.read()
+                    compressed = compress(data)
+                    if len(compressed) >= len(data) * 0.95:
+                        # Not worth a Content-Encoding round trip, drop any stale variant
+                        if os.path.exists(target):
+                            os.remove(target)
+                        continue
+                    with open(target, 'wb') as f:
+                        f.write(compressed)
+                    written += 1
+                    saved += len(data) - len(compressed)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} compressed files ({saved / 1024:.1f} KiB saved), {skipped} already up to date"
+        ))
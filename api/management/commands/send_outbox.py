@@ -0,0 +1,36 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+from api.models import OutboundEmail
+from api.outbox import process_due
+
+
+class Command(BaseCommand):
+    help = "Sends queued transactional emails, retrying failures with backoff"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Send what is due now and exit')
+        parser.add_argument('--interval', type=float, default=15, help='Seconds between polls when running continuously')
+        parser.add_argument('--prune-days', type=int, default=30, help='Delete sent emails older than this many days')
+
+    def handle(self, *args, **options):
+        while True:
+            totals = [0, 0, 0]
+            while True:
+                batch = process_due()
+                totals = [a + b for a, b in zip(totals, batch)]
+                if not sum(batch):
+                    break
+            pruned, _ = OutboundEmail.objects.filter(
+                status='sent', sent_at__lt=timezone.now() - timedelta(days=options['prune_days'])
+            ).delete()
+            if sum(totals) or pruned or options['once']:
+                self.stdout.write(
+                    f"Sent {totals[0]}, retrying {totals[1]}, failed {totals[2]}, pruned {pruned} old emails"
+                )
+            if options['once']:
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:02
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_published_at(apps, schema_editor):
+    BlogPost = apps.get_model("api", "BlogPost")
+    BlogPost.objects.filter(status="published", published_at__isnull=True).update(
+        published_at=F("created_at")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0007_valentineresponse_message"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_published_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="blogpost",
+            index=models.Index(
+                fields=["status", "-published_at", "-id"], name="blog_published_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:20
+
+from django.db import migrations
+from django.utils.html import strip_tags
+
+FTS_TABLE = "api_blogpost_fts"
+
+
+def create_fts_table(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                "title, excerpt, content, tags, tokenize='porter unicode61')"
+            )
+        except Exception:
+            # SQLite built without FTS5, search falls back to the in-memory index
+            return
+        BlogPost = apps.get_model("api", "BlogPost")
+        for post in BlogPost.objects.all():
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, excerpt, content, tags) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                [
+                    post.pk,
+                    post.title,
+                    post.excerpt,
+                    strip_tags(post.content or ""),
+                    " ".join(post.tags or []),
+                ],
+            )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0008_blogpost_published_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_tag_index(apps, schema_editor):
+    BlogPost = apps.get_model("api", "BlogPost")
+    BlogPostTag = apps.get_model("api", "BlogPostTag")
+    rows = []
+    for post in BlogPost.objects.all():
+        for tag in {str(tag)[:100] for tag in post.tags or [] if tag}:
+            rows.append(BlogPostTag(post=post, tag=tag))
+    BlogPostTag.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0009_blogpost_fts"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BlogPostTag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("tag", models.CharField(db_index=True, max_length=100)),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="tag_index",
+                        to="api.blogpost",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("post", "tag"), name="unique_blogpost_tag"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_tag_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0010_blogposttag"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="blogpost",
+            name="featured_image_renditions",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                help_text="Resized WebP/JPEG copies of the featured image, filled in by a background worker",
+            ),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:11
+
+import api.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0011_blogpost_featured_image_renditions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StoredFile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=500, unique=True)),
+                ("sha256", models.CharField(db_index=True, max_length=64)),
+                ("size", models.BigIntegerField()),
+                ("refcount", models.PositiveIntegerField(default=1)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="blogpost",
+            name="featured_image",
+            field=models.ImageField(
+                blank=True,
+                help_text="Featured image for blog post",
+                max_length=255,
+                null=True,
+                storage=api.storage.get_content_storage,
+                upload_to="blog/featured/",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="personaldata",
+            name="resume",
+            field=models.FileField(
+                blank=True,
+                max_length=255,
+                null=True,
+                storage=api.storage.get_content_storage,
+                upload_to="resumes/",
+            ),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:05
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def remove_duplicate_ips(apps, schema_editor):
+    # Concurrent get_or_create calls could store one IP twice; keep the newest row
+    ValentineResponse = apps.get_model("api", "ValentineResponse")
+    duplicates = (
+        ValentineResponse.objects.filter(ip_address__isnull=False)
+        .values("ip_address")
+        .annotate(keep=Max("id"), count=Count("id"))
+        .filter(count__gt=1)
+    )
+    for row in duplicates:
+        ValentineResponse.objects.filter(ip_address=row["ip_address"]).exclude(id=row["keep"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0013_outboundemail"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_ips, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="valentineresponse",
+            name="ip_address",
+            field=models.GenericIPAddressField(blank=True, null=True, unique=True),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from ckeditor_uploader.fields import RichTextUploadingField
 from django.utils.text import slugify
+from .storage import get_content_storage
 
 class PersonalData(models.Model):
     name = models.CharField(max_length=255)
@@ -13,7 +14,7 @@ class PersonalData(models.Model):
     email = models.EmailField(blank=True, null=True)
     linkedin = models.URLField(blank=True, null=True)
     github = models.URLField(blank=True, null=True)
-    resume = models.FileField(upload_to='resumes/', blank=True, null=True)
+    resume = models.FileField(upload_to='resumes/', storage=get_content_storage, max_length=255, blank=True, null=True)
 
     def __str__(self):
         return self.name
@@ -64,7 +65,8 @@ class BlogPost(models.Model):
     slug = models.SlugField(max_length=255, unique=True, blank=True, help_text="URL-friendly version of title")
     excerpt = models.TextField(max_length=500, help_text="Short description for preview")
     content = RichTextUploadingField(config_name='blog', help_text="Main blog content with rich text formatting")
-    featured_image = models.ImageField(upload_to='blog/featured/', blank=True, null=True, help_text="Featured image for blog post")
+    featured_image = models.ImageField(upload_to='blog/featured/', storage=get_content_storage, max_length=255, blank=True, null=True, help_text="Featured image for blog post")
+    featured_image_renditions = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized WebP/JPEG copies of the featured image, filled in by a background worker")
     author = models.CharField(max_length=255, default="Yugal Kishor")
     tags = models.JSONField(default=list, help_text="List of tags (e.g., ['MERN + AI', 'Django', 'AI'])")
     category = models.CharField(max_length=100, default="Technology", help_text="Blog category")
@@ -81,6 +83,9 @@ class BlogPost(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-published_at', '-id'], name='blog_published_idx'),
+        ]
         verbose_name = 'Blog Post'
         verbose_name_plural = 'Blog Posts'
     
@@ -89,11 +94,38 @@ class BlogPost(models.Model):
             self.slug = slugify(self.title)
         if not self.meta_description:
             self.meta_description = self.excerpt[:160]
+        if self.status == 'published' and not self.published_at:
+            # Blog pagination is keyed on published_at, keep it set for published posts
+            from django.utils import timezone
+            self.published_at = timezone.now()
         super().save(*args, **kwargs)
     
     def __str__(self):
         return self.title
 
+class BlogPostTag(models.Model):
+    """Normalized copy of BlogPost.tags so tag lookups and counts can use an index"""
+    post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='tag_index')
+    tag = models.CharField(max_length=100, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'tag'], name='unique_blogpost_tag'),
+        ]
+
+    @classmethod
+    def sync(cls, post):
+        """Brings the index rows for a post in line with its tags list"""
+        wanted = {str(tag)[:100] for tag in post.tags or [] if tag}
+        existing = set(cls.objects.filter(post=post).values_list('tag', flat=True))
+        if existing - wanted:
+            cls.objects.filter(post=post, tag__in=existing - wanted).delete()
+        if wanted - existing:
+            cls.objects.bulk_create([cls(post=post, tag=tag) for tag in wanted - existing])
+
+    def __str__(self):
+        return f"{self.tag} on {self.post}"
+
 class AdminOTP(models.Model):
     user = models.OneToOneField('auth.User', on_delete=models.CASCADE, related_name='otp')
     otp = models.CharField(max_length=6)
@@ -122,7 +154,7 @@ class ServiceQuery(models.Model):
 
 class ValentineResponse(models.Model):
     response = models.CharField(max_length=10)
-    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    ip_address = models.GenericIPAddressField(null=True, blank=True, unique=True)
     device_model = models.CharField(max_length=255, null=True, blank=True)
     location = models.CharField(max_length=500, null=True, blank=True)
     message = models.TextField(null=True, blank=True)
@@ -130,3 +162,45 @@ class ValentineResponse(models.Model):
 
     def __str__(self):
         return f"{self.response} from {self.ip_address} at {self.created_at}"
+
+
+class StoredFile(models.Model):
+    """One content-addressed file in media storage and how many uploads point at it"""
+    name = models.CharField(max_length=500, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.BigIntegerField()
+    refcount = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} refs)"
+
+
+class OutboundEmail(models.Model):
+    """Transactional email waiting to go out through Brevo (see api/outbox.py)"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50)
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=500)
+    html_content = models.TextField()
+    sender_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['next_attempt_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} to {self.to_email} ({self.status})"
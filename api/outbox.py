@@ -0,0 +1,145 @@
+import random
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+
+class PermanentError(Exception):
+    """Delivery failed in a way retrying won't fix (e.g. Brevo rejected the address)."""
+
+
+def enqueue(kind, to_email, subject, html_content, sender_name):
+    """Stores an email for the outbox worker. The request path never talks to Brevo itself."""
+    from .models import OutboundEmail
+
+    email = OutboundEmail.objects.create(
+        kind=kind, to_email=to_email, subject=subject, html_content=html_content,
+        sender_name=sender_name, next_attempt_at=timezone.now(),
+    )
+    transaction.on_commit(outbox_worker.wake)
+    return email
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter: base, 2x base, 4x base... capped at EMAIL_OUTBOX_RETRY_MAX."""
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_BASE', 30)
+    cap = getattr(settings, 'EMAIL_OUTBOX_RETRY_MAX', 3600)
+    delay = min(cap, base * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def deliver(emails):
+    from .admin_overrides import send_outbound_emails
+    send_outbound_emails(emails)
+
+
+def _batches(emails, size):
+    """Groups emails by sender, so one Brevo request can carry each group as message versions."""
+    groups = {}
+    for email in emails:
+        groups.setdefault(email.sender_name, []).append(email)
+    for group in groups.values():
+        for i in range(0, len(group), size):
+            yield group[i:i + size]
+
+
+def _send_batch(batch, max_attempts):
+    from .models import OutboundEmail
+
+    try:
+        deliver(batch)
+    except PermanentError as e:
+        if len(batch) > 1:
+            # One bad address fails the whole request; retry one by one so the rest still go out
+            results = [_send_batch([email], max_attempts) for email in batch]
+            return tuple(map(sum, zip(*results)))
+        error = e
+    except Exception as e:
+        error = e
+    else:
+        OutboundEmail.objects.filter(pk__in=[email.pk for email in batch]).update(
+            status='sent', sent_at=timezone.now(), last_error=''
+        )
+        return len(batch), 0, 0
+
+    retrying = failed = 0
+    message = f"{type(error).__name__}: {error}"[:2000]
+    for email in batch:
+        if isinstance(error, PermanentError) or email.attempts >= max_attempts:
+            OutboundEmail.objects.filter(pk=email.pk).update(status='failed', last_error=message)
+            print(f"Outbox: giving up on {email} after {email.attempts} attempt(s): {message}")
+            failed += 1
+        else:
+            retry_at = timezone.now() + timedelta(seconds=retry_delay(email.attempts))
+            OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=retry_at, last_error=message)
+            retrying += 1
+    return 0, retrying, failed
+
+
+def process_due(limit=20):
+    """Sends up to `limit` due emails. Returns (sent, retrying, failed) counts."""
+    from .models import OutboundEmail
+
+    max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 6)
+    lease = timedelta(seconds=getattr(settings, 'EMAIL_OUTBOX_LEASE', 300))
+    batch_size = getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 50)
+    now = timezone.now()
+    claimed = []
+    for email in OutboundEmail.objects.filter(status='pending', next_attempt_at__lte=now)[:limit]:
+        # Claim the row by pushing its next attempt past the lease, so a second worker skips it
+        # and a worker that dies mid-send leaves it to be picked up again later
+        if OutboundEmail.objects.filter(
+            pk=email.pk, status='pending', next_attempt_at=email.next_attempt_at
+        ).update(next_attempt_at=now + lease, attempts=F('attempts') + 1):
+            email.attempts += 1
+            claimed.append(email)
+
+    sent = retrying = failed = 0
+    for batch in _batches(claimed, batch_size):
+        batch_sent, batch_retrying, batch_failed = _send_batch(batch, max_attempts)
+        sent += batch_sent
+        retrying += batch_retrying
+        failed += batch_failed
+    return sent, retrying, failed
+
+
+class OutboxWorker:
+    """
+    In-process sender thread, started on the first enqueue. It sends right away when
+    woken and otherwise polls every `poll_interval` seconds for retries that came due.
+    `manage.py send_outbox` does the same job as a separate process.
+    """
+
+    def __init__(self, poll_interval=15):
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def wake(self):
+        if not getattr(settings, 'EMAIL_OUTBOX_WORKER', True):
+            return
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='email-outbox', daemon=True)
+                    self._thread.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                while sum(process_due()):
+                    pass
+            except Exception as e:
+                print(f"Outbox worker error: {e}")
+            finally:
+                close_old_connections()
+
+
+outbox_worker = OutboxWorker(poll_interval=getattr(settings, 'EMAIL_OUTBOX_POLL_INTERVAL', 15))
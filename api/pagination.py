@@ -0,0 +1,21 @@
+from rest_framework.pagination import CursorPagination
+
+
+class BlogPostCursorPagination(CursorPagination):
+    """
+    Cursor pagination for published posts, newest first.
+    Ties on published_at are broken by id so the cursor position is stable.
+
+    Requests with neither `cursor` nor `page_size` still get the bare list of posts,
+    the shape clients built before pagination (e.g. a deployed static export) expect.
+    """
+    ordering = ('-published_at', '-id')
+    page_size = 12
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
@@ -0,0 +1,190 @@
+import json
+import os
+import threading
+from django.conf import settings
+from .cache import combined_version
+from .snapshot import PORTFOLIO_MODELS
+from .models import PersonalData, SkillCategory, Experience, Project, Achievement
+from .retrieval import retrieval_index, resume_path
+
+RESUME_PROMPT = """
+You are Nance, a highly advanced AI assistant for Yugal Kishor.
+Your persona is professional, intelligent, and helpful, similar to NANCE from Yugal Kishor.
+You are requested to answer questions based on Yugal's resume.
+
+Resume Context:
+{context}
+
+Rules:
+1. Always answer in the persona of Nance ("Sir", "Processing", etc. are good, but keep it concise).
+2. Only answer questions related to Yugal's professional background, skills, and resume.
+3. If the question is unrelated, politely decline and steer back to Yugal.
+4. Keep answers brief and to the point suitable for a chat interface.
+"""
+
+PORTFOLIO_PROMPT = """
+You are Nance, a highly advanced AI assistant for Yugal Kishor.
+Your persona is professional, intelligent, and helpful, similar to NANCE from Yugal.
+You have access to Yugal's live portfolio data from the database.
+
+PORTFOLIO DATA:
+{context}
+
+INSTRUCTIONS:
+1. You are engaging in a live chat. Keep responses concise, engaging, and professional.
+2. Use the provided portfolio data to answer questions accurately.
+3. If a user asks about something not in the data, gently steer them back to Yugal's professional skills and experience.
+4. Do not hallucinatel; if you don't know, say you don't have that information.
+"""
+
+# kind -> (prompt template, model's opening reply)
+PROMPTS = {
+    'resume': (RESUME_PROMPT, "Hello Sir, I am online and ready to assist you with inquiries regarding Mr. Kishor's portfolio."),
+    'portfolio': (PORTFOLIO_PROMPT, "Hello! I am Jarvis, Yugal's digital assistant. How can I help you learn more about his work today?"),
+}
+
+
+def profile(personal_data):
+    return {
+        "name": personal_data.name,
+        "role": personal_data.role,
+        "about": personal_data.about_description,
+        "mission": personal_data.mission,
+        "values": personal_data.about_values,
+        "contact": {
+            "email": personal_data.email,
+            "linkedin": personal_data.linkedin,
+            "github": personal_data.github,
+        },
+    } if personal_data else {}
+
+
+def build_portfolio_context():
+    personal_data = PersonalData.objects.first()
+    skills = [{"category": c.name, "items": c.items} for c in SkillCategory.objects.all()]
+    experiences = [
+        {"company": e.company, "role": e.role, "period": e.period,
+         "description": e.description, "achievements": e.achievements}
+        for e in Experience.objects.all()
+    ]
+    projects = [
+        {"title": p.title, "category": p.category, "description": p.description, "tech": p.tech, "link": p.link}
+        for p in Project.objects.all()
+    ]
+    achievements = [
+        {"label": a.label, "metric": a.metric, "description": a.description}
+        for a in Achievement.objects.all()
+    ]
+    pd_dict = profile(personal_data)
+
+    context_str = f"Personal Info: {json.dumps(pd_dict)}\n"
+    context_str += f"Skills: {json.dumps(skills)}\n"
+    context_str += f"Experience: {json.dumps(experiences)}\n"
+    context_str += f"Projects: {json.dumps(projects)}\n"
+    context_str += f"Achievements: {json.dumps(achievements)}"
+    return context_str
+
+
+def build_retrieval_context():
+    # Everything else arrives per question, as the top chunks from api.retrieval
+    return (
+        f"Personal Info: {json.dumps(profile(PersonalData.objects.first()))}\n"
+        "Relevant excerpts from the resume, skills, experience, projects, achievements and blog posts "
+        "are attached to each question. Answer from them."
+    )
+
+
+def build_resume_context():
+    with open(resume_path(), 'r') as f:
+        return f.read()
+
+
+def retrieval_enabled():
+    return getattr(settings, 'CHAT_RETRIEVAL', True)
+
+
+class PromptContext:
+    """
+    Builds the chatbot system prompts once and keeps them in memory.
+
+    Each prompt is tagged with a version: the portfolio models' change stamps
+    (bumped from signals.py) for the live data prompt, the mtime of resume.txt for
+    the resume prompt. A prompt is only rebuilt when its version moves.
+
+    With CHAT_RETRIEVAL on, both prompts carry only the profile and the data comes
+    in per question from api.retrieval, so the version covers the whole index.
+    """
+
+    builders = {'resume': build_resume_context, 'portfolio': build_portfolio_context}
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Separate from _lock, so counting a hit never waits for a rebuild
+        self._stats_lock = threading.Lock()
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, kind):
+        if retrieval_enabled():
+            # Answers depend on everything that can be retrieved, not just the prompt text
+            return f"{combined_version(PersonalData)}-{retrieval_index.version()}"
+        if kind == 'resume':
+            try:
+                return format(os.stat(resume_path()).st_mtime_ns, 'x')
+            except OSError:
+                return None
+        return combined_version(*PORTFOLIO_MODELS)
+
+    def get(self, kind):
+        """Returns (system prompt, opening reply, version) for `kind`, rebuilding if stale."""
+        version = self.version(kind)
+        entry = self._entries.get(kind)
+        if entry is not None and entry[2] == version:
+            self._count(hit=True)
+            return entry
+        with self._lock:
+            entry = self._entries.get(kind)
+            if entry is not None and entry[2] == version:
+                self._count(hit=True)
+                return entry
+            self._count(hit=False)
+            template, greeting = PROMPTS[kind]
+            builder = build_retrieval_context if retrieval_enabled() else self.builders[kind]
+            entry = (template.format(context=builder()), greeting, version)
+            self._entries[kind] = entry
+            return entry
+
+    def _count(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def opening(self, kind):
+        """
+        Returns (history, version) where history is the immutable opening turns of a chat.
+        Every session shares the same prompt strings instead of holding its own copy.
+        """
+        prompt, greeting, version = self.get(kind)
+        return (('user', prompt), ('model', greeting)), version
+
+    def invalidate(self, kind=None):
+        with self._lock:
+            if kind is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(kind, None)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 3) if total else None,
+            'cached': sorted(self._entries),
+        }
+
+
+prompt_context = PromptContext()
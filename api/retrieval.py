@@ -0,0 +1,216 @@
+import math
+import os
+import threading
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.utils.html import strip_tags
+from .cache import get_stamps
+from .models import SkillCategory, Experience, Project, Achievement, BlogPost
+from .search import tokenize
+
+# Models whose rows become retrieval chunks; the resume file is indexed alongside them
+INDEXED_MODELS = (SkillCategory, Experience, Project, Achievement, BlogPost)
+CHUNK_WORDS = 120
+CHUNK_OVERLAP = 20
+
+
+def resume_path():
+    return os.path.join(settings.BASE_DIR, 'resume.txt')
+
+
+def chunk_text(text, size=CHUNK_WORDS, overlap=CHUNK_OVERLAP):
+    """Splits text on blank lines, then cuts long paragraphs into overlapping word windows."""
+    chunks, current = [], []
+    for paragraph in text.split('\n\n'):
+        words = paragraph.split()
+        if current and len(current) + len(words) > size:
+            chunks.append(' '.join(current))
+            current = []
+        current += words
+        while len(current) > size:
+            chunks.append(' '.join(current[:size]))
+            current = current[size - overlap:]
+    if current:
+        chunks.append(' '.join(current))
+    return chunks
+
+
+def instance_chunks(instance):
+    """The text chunks an indexed row contributes, e.g. one per project or several per blog post."""
+    if isinstance(instance, SkillCategory):
+        return [f"Skills ({instance.name}): {', '.join(instance.items)}"]
+    if isinstance(instance, Experience):
+        achievements = ' '.join(instance.achievements or [])
+        return [f"Experience: {instance.role} at {instance.company} ({instance.period}). {instance.description} {achievements}"]
+    if isinstance(instance, Project):
+        return [f"Project: {instance.title} ({instance.category}). {instance.description} "
+                f"Tech: {', '.join(instance.tech or [])}. {instance.link}"]
+    if isinstance(instance, Achievement):
+        return [f"Achievement: {instance.metric} {instance.label}. {instance.description}"]
+    if isinstance(instance, BlogPost):
+        if instance.status != 'published':
+            return []
+        body = f"{instance.excerpt}\n\n{strip_tags(instance.content or '')}"
+        return [f"Blog post \"{instance.title}\": {chunk}" for chunk in chunk_text(body)]
+    return []
+
+
+def source_key(instance):
+    return (instance._meta.label_lower, instance.pk)
+
+
+class BM25Index:
+    """Okapi BM25 over short text chunks. Chunks are grouped by source so a row can be replaced in place."""
+
+    k1 = 1.5
+    b = 0.75
+
+    def __init__(self):
+        self._chunks = {}  # chunk id -> (term counts, length, text)
+        self._sources = {}  # source key -> [chunk ids]
+        self._postings = defaultdict(dict)  # term -> {chunk id: term frequency}
+        self._total_length = 0
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._chunks)
+
+    def set_source(self, key, texts):
+        self.remove_source(key)
+        ids = []
+        for text in texts:
+            terms = Counter(tokenize(text))
+            if not terms:
+                continue
+            chunk_id, self._next_id = self._next_id, self._next_id + 1
+            length = sum(terms.values())
+            self._chunks[chunk_id] = (terms, length, text)
+            self._total_length += length
+            for term, tf in terms.items():
+                self._postings[term][chunk_id] = tf
+            ids.append(chunk_id)
+        if ids:
+            self._sources[key] = ids
+
+    def remove_source(self, key):
+        for chunk_id in self._sources.pop(key, ()):
+            terms, length, _ = self._chunks.pop(chunk_id)
+            self._total_length -= length
+            for term in terms:
+                self._postings[term].pop(chunk_id, None)
+                if not self._postings[term]:
+                    del self._postings[term]
+
+    def sources(self, label):
+        return [key for key in self._sources if key[0] == label]
+
+    def search(self, query, k):
+        """Returns the text of the `k` best chunks for `query`."""
+        count = len(self._chunks)
+        if not count:
+            return []
+        average = self._total_length / count
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf in postings.items():
+                length = self._chunks[chunk_id][1]
+                scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / average))
+        best = sorted(scores, key=scores.get, reverse=True)[:k]
+        return [self._chunks[chunk_id][2] for chunk_id in best]
+
+
+class RetrievalIndex:
+    """
+    Chatbot retrieval over resume.txt and the portfolio/blog tables.
+
+    Built on first use. Saves and deletes in this process update single rows
+    (see signals.py); a model whose change stamp moved some other way (another
+    worker, a bulk update) is re-read on the next search, and the resume is
+    re-chunked when its mtime changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = None
+        self._stamps = {}
+        self._resume_mtime = None
+
+    def _resume_mtime_now(self):
+        try:
+            return os.stat(resume_path()).st_mtime_ns
+        except OSError:
+            return None
+
+    def version(self):
+        """Changes whenever anything the index is built from changes."""
+        stamps = get_stamps(*INDEXED_MODELS)
+        parts = [format(stamps[model], 'x') for model in INDEXED_MODELS]
+        return '-'.join(parts + [format(self._resume_mtime_now() or 0, 'x')])
+
+    def _sync_model(self, model, stamp):
+        label = model._meta.label_lower
+        seen = set()
+        queryset = model.objects.filter(status='published') if model is BlogPost else model.objects.all()
+        for instance in queryset:
+            key = source_key(instance)
+            seen.add(key)
+            self._index.set_source(key, instance_chunks(instance))
+        for key in self._index.sources(label):
+            if key not in seen:
+                self._index.remove_source(key)
+        self._stamps[model] = stamp
+
+    def _sync(self):
+        if self._index is None:
+            self._index = BM25Index()
+        for model, stamp in get_stamps(*INDEXED_MODELS).items():
+            if self._stamps.get(model) != stamp:
+                self._sync_model(model, stamp)
+        mtime = self._resume_mtime_now()
+        if mtime != self._resume_mtime:
+            texts = []
+            if mtime is not None:
+                with open(resume_path(), 'r') as f:
+                    texts = [f"Resume: {chunk}" for chunk in chunk_text(f.read())]
+            self._index.set_source(('resume', None), texts)
+            self._resume_mtime = mtime
+
+    def update(self, instance):
+        """Re-indexes one row after its change has been committed and stamped."""
+        with self._lock:
+            if self._index is None:
+                return
+            self._index.set_source(source_key(instance), instance_chunks(instance))
+            self._stamps[type(instance)] = get_stamps(type(instance))[type(instance)]
+
+    def remove(self, model, pk):
+        with self._lock:
+            if self._index is None:
+                return
+            self._index.remove_source((model._meta.label_lower, pk))
+            self._stamps[model] = get_stamps(model)[model]
+
+    def search(self, query, k=None):
+        k = k or getattr(settings, 'CHAT_RETRIEVAL_TOP_K', 5)
+        with self._lock:
+            self._sync()
+            return self._index.search(query, k)
+
+    def context_for(self, query, k=None):
+        """The top-k chunks for `query`, formatted for the prompt."""
+        chunks = self.search(query, k)
+        if not chunks:
+            return "No matching excerpts were found."
+        return '\n'.join(f"- {chunk}" for chunk in chunks)
+
+
+def with_context(question, context):
+    """The user turn sent to the model: retrieved excerpts, then the visitor's question."""
+    return f"Relevant excerpts:\n{context}\n\nQuestion: {question}"
+
+
+retrieval_index = RetrievalIndex()
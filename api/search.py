@@ -0,0 +1,173 @@
+import math
+import re
+import threading
+from collections import defaultdict
+from django.db import connection
+from django.utils.html import strip_tags
+
+FTS_TABLE = 'api_blogpost_fts'
+FTS_COLUMNS = ('title', 'excerpt', 'content', 'tags')
+# Ranking weights, in FTS_COLUMNS order
+WEIGHTS = (10.0, 5.0, 1.0, 3.0)
+MARK_START, MARK_END = '<mark>', '</mark>'
+SNIPPET_WORDS = 16
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def document(post):
+    """The searchable text of a post, in FTS_COLUMNS order."""
+    return (post.title, post.excerpt, strip_tags(post.content or ''), ' '.join(post.tags or []))
+
+
+class FTS5Index:
+    """Search backed by the SQLite FTS5 table created in migration 0009."""
+
+    def update(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, excerpt, content, tags) VALUES (%s, %s, %s, %s, %s)',
+                [post.pk, *document(post)]
+            )
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+    def search(self, query, limit):
+        """Returns [(post_id, snippet)] for published posts, best match first."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        # Quote every term so user input can never be read as FTS5 query syntax
+        match = ' '.join(f'"{term}"*' for term in terms)
+        weights = ', '.join(str(w) for w in WEIGHTS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT fts.rowid, snippet({FTS_TABLE}, -1, %s, %s, '…', %s)
+                FROM {FTS_TABLE} AS fts
+                JOIN api_blogpost AS post ON post.id = fts.rowid
+                WHERE {FTS_TABLE} MATCH %s AND post.status = 'published'
+                ORDER BY bm25({FTS_TABLE}, {weights})
+                LIMIT %s
+                """,
+                [MARK_START, MARK_END, SNIPPET_WORDS, match, limit]
+            )
+            return cursor.fetchall()
+
+
+class InvertedIndex:
+    """
+    Pure-Python fallback for databases without FTS5.
+    Built from the database on first search and kept current by signals in this process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = None  # term -> {post_id: weighted term frequency}
+        self._docs = {}  # post_id -> (terms, content)
+
+    def _ensure_built(self):
+        if self._postings is not None:
+            return
+        from .models import BlogPost
+        self._postings = defaultdict(dict)
+        for post in BlogPost.objects.all():
+            self._add(post)
+
+    def _add(self, post):
+        text = document(post)
+        weighted = defaultdict(float)
+        for weight, field in zip(WEIGHTS, text):
+            for term in tokenize(field):
+                weighted[term] += weight
+        for term, tf in weighted.items():
+            self._postings[term][post.pk] = tf
+        self._docs[post.pk] = (set(weighted), text[2])
+
+    def _remove(self, post_id):
+        terms, _ = self._docs.pop(post_id, (set(), ''))
+        for term in terms:
+            self._postings[term].pop(post_id, None)
+            if not self._postings[term]:
+                del self._postings[term]
+
+    def update(self, post):
+        with self._lock:
+            if self._postings is None:
+                return
+            self._remove(post.pk)
+            self._add(post)
+
+    def remove(self, post_id):
+        with self._lock:
+            if self._postings is not None:
+                self._remove(post_id)
+
+    def search(self, query, limit):
+        from .models import BlogPost
+
+        terms = tokenize(query)
+        if not terms:
+            return []
+        with self._lock:
+            self._ensure_built()
+            total = len(self._docs) or 1
+            scores = None
+            for term in terms:
+                # Prefix match, like the FTS5 backend
+                matches = defaultdict(float)
+                for indexed in self._postings:
+                    if indexed.startswith(term):
+                        postings = self._postings[indexed]
+                        idf = math.log(1 + total / len(postings))
+                        for post_id, tf in postings.items():
+                            matches[post_id] += tf * idf
+                if scores is None:
+                    scores = matches
+                else:
+                    scores = {pid: scores[pid] + score for pid, score in matches.items() if pid in scores}
+            ranked = sorted(scores, key=scores.get, reverse=True)
+            contents = {pid: self._docs[pid][1] for pid in ranked}
+
+        published = set(BlogPost.objects.filter(pk__in=ranked, status='published').values_list('pk', flat=True))
+        ranked = [pid for pid in ranked if pid in published][:limit]
+        return [(pid, highlight(contents[pid], terms)) for pid in ranked]
+
+
+def highlight(text, terms):
+    """Returns a window of `text` around the first matching word, with matches marked."""
+    words = text.split()
+    is_match = lambda word: any(t.startswith(term) for t in tokenize(word) for term in terms)
+    first = next((i for i, word in enumerate(words) if is_match(word)), 0)
+    start = max(0, first - SNIPPET_WORDS // 4)
+    window = words[start:start + SNIPPET_WORDS]
+    marked = [f'{MARK_START}{word}{MARK_END}' if is_match(word) else word for word in window]
+    prefix = '…' if start > 0 else ''
+    suffix = '…' if start + SNIPPET_WORDS < len(words) else ''
+    return prefix + ' '.join(marked) + suffix
+
+
+def fts5_available():
+    if connection.vendor != 'sqlite':
+        return False
+    return FTS_TABLE in connection.introspection.table_names()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_search_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = FTS5Index() if fts5_available() else InvertedIndex()
+    return _index
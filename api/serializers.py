@@ -56,13 +56,32 @@ class AchievementSerializer(serializers.ModelSerializer):
         model = Achievement
         fields = '__all__'
 
-class BlogPostListSerializer(serializers.ModelSerializer):
+class FeaturedImageSrcsetMixin(serializers.Serializer):
+    """Adds `featured_image_srcset`: {"webp": {"320": url, ...}, "jpeg": {...}}"""
+    featured_image_srcset = serializers.SerializerMethodField()
+
+    def get_featured_image_srcset(self, obj):
+        renditions = obj.featured_image_renditions or {}
+        # Renditions of a replaced image are stale until the worker catches up
+        if not obj.featured_image or renditions.get('source') != obj.featured_image.name:
+            return None
+        request = self.context.get('request')
+        storage = obj.featured_image.storage
+        srcset = {}
+        for fmt in ('webp', 'jpeg'):
+            srcset[fmt] = {}
+            for width, name in renditions.get(fmt, {}).items():
+                url = storage.url(name)
+                srcset[fmt][width] = request.build_absolute_uri(url) if request else url
+        return srcset
+
+class BlogPostListSerializer(FeaturedImageSrcsetMixin, serializers.ModelSerializer):
     """Serializer for blog post list view"""
     featured_image_url = serializers.SerializerMethodField()
     
     class Meta:
         model = BlogPost
-        fields = ['id', 'title', 'slug', 'excerpt', 'featured_image_url', 'author', 
+        fields = ['id', 'title', 'slug', 'excerpt', 'featured_image_url', 'featured_image_srcset', 'author', 
                   'category', 'tags', 'read_time', 'views', 'created_at', 'published_at']
     
     def get_featured_image_url(self, obj):
@@ -72,13 +91,13 @@ class BlogPostListSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.featured_image.url)
         return None
 
-class BlogPostDetailSerializer(serializers.ModelSerializer):
+class BlogPostDetailSerializer(FeaturedImageSrcsetMixin, serializers.ModelSerializer):
     """Serializer for blog post detail view"""
     featured_image_url = serializers.SerializerMethodField()
     
     class Meta:
         model = BlogPost
-        fields = ['id', 'title', 'slug', 'excerpt', 'content', 'featured_image_url', 
+        fields = ['id', 'title', 'slug', 'excerpt', 'content', 'featured_image_url', 'featured_image_srcset', 
                   'author', 'category', 'tags', 'read_time', 'views', 'created_at', 
                   'updated_at', 'published_at', 'meta_description', 'meta_keywords']
     
@@ -0,0 +1,113 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from .cache import bump_stamp
+from .images import submit, generate_featured_renditions, delete_renditions, rewrite_upload_urls, rewrite_post_uploads
+from .models import BlogPost, BlogPostTag, PersonalData
+from .prompt_context import prompt_context
+from .retrieval import INDEXED_MODELS, retrieval_index
+from .search import get_search_index
+from .snapshot import PORTFOLIO_MODELS
+from .storage import content_storage, is_content_addressed
+
+
+def portfolio_changed(sender, **kwargs):
+    # Wait for the commit so readers never stamp a snapshot with uncommitted data
+    def _refresh():
+        # The snapshot sees the new stamp and rebuilds on its next request
+        bump_stamp(sender)
+        prompt_context.invalidate('portfolio')
+    transaction.on_commit(_refresh)
+
+
+def blog_post_changed(sender, **kwargs):
+    transaction.on_commit(lambda: bump_stamp(BlogPost))
+
+
+def blog_post_saved(sender, instance, **kwargs):
+    # Same transaction as the save, so the indexes can't drift from the table
+    get_search_index().update(instance)
+    BlogPostTag.sync(instance)
+
+
+def blog_post_deleted(sender, instance, **kwargs):
+    get_search_index().remove(instance.pk)
+
+
+def blog_post_content_saving(sender, instance, **kwargs):
+    # Uploads optimized before this save get swapped here, later ones by the worker
+    instance.content = rewrite_upload_urls(instance.content)
+
+
+def blog_post_content_saved(sender, instance, **kwargs):
+    # Catches copies the worker finished between the rewrite above and the commit
+    if instance.content:
+        transaction.on_commit(lambda: submit(rewrite_post_uploads, instance.pk))
+
+
+def blog_post_image_changed(sender, instance, **kwargs):
+    renditions = instance.featured_image_renditions or {}
+    if instance.featured_image:
+        if renditions.get('source') != instance.featured_image.name:
+            transaction.on_commit(lambda: submit(generate_featured_renditions, instance.pk))
+    elif renditions:
+        BlogPost.objects.filter(pk=instance.pk).update(featured_image_renditions={})
+        transaction.on_commit(lambda: submit(delete_renditions, renditions))
+
+
+def retrieval_row_saved(sender, instance, **kwargs):
+    # Registered after the stamp bumps, so the index records the post-change stamp
+    transaction.on_commit(lambda: retrieval_index.update(instance))
+
+
+def retrieval_row_deleted(sender, instance, **kwargs):
+    # Django clears instance.pk once the delete is done, so take it now
+    pk = instance.pk
+    transaction.on_commit(lambda: retrieval_index.remove(sender, pk))
+
+
+# File fields kept in content-addressed storage, whose references we count
+COUNTED_FILE_FIELDS = {BlogPost: 'featured_image', PersonalData: 'resume'}
+
+
+def release_replaced_file(sender, instance, **kwargs):
+    if not instance.pk:
+        return
+    field = COUNTED_FILE_FIELDS[sender]
+    old = sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+    new = getattr(instance, field)
+    # A fresh upload always takes its own reference, even if it hashes to the old file
+    if old and is_content_addressed(old) and (not new or not new._committed or new.name != old):
+        transaction.on_commit(lambda: content_storage.delete(old))
+
+
+def release_deleted_file(sender, instance, **kwargs):
+    name = getattr(instance, COUNTED_FILE_FIELDS[sender]).name
+    if name and is_content_addressed(name):
+        transaction.on_commit(lambda: content_storage.delete(name))
+
+
+def blog_post_image_deleted(sender, instance, **kwargs):
+    if instance.featured_image_renditions:
+        transaction.on_commit(lambda: submit(delete_renditions, instance.featured_image_renditions))
+
+
+for model in PORTFOLIO_MODELS:
+    post_save.connect(portfolio_changed, sender=model, dispatch_uid=f'portfolio_save_{model.__name__}')
+    post_delete.connect(portfolio_changed, sender=model, dispatch_uid=f'portfolio_delete_{model.__name__}')
+
+post_save.connect(blog_post_changed, sender=BlogPost, dispatch_uid='blog_post_save')
+post_delete.connect(blog_post_changed, sender=BlogPost, dispatch_uid='blog_post_delete')
+post_save.connect(blog_post_saved, sender=BlogPost, dispatch_uid='blog_post_search_save')
+post_delete.connect(blog_post_deleted, sender=BlogPost, dispatch_uid='blog_post_search_delete')
+post_save.connect(blog_post_image_changed, sender=BlogPost, dispatch_uid='blog_post_image_save')
+post_delete.connect(blog_post_image_deleted, sender=BlogPost, dispatch_uid='blog_post_image_delete')
+pre_save.connect(blog_post_content_saving, sender=BlogPost, dispatch_uid='blog_post_content_saving')
+post_save.connect(blog_post_content_saved, sender=BlogPost, dispatch_uid='blog_post_content_saved')
+
+for model in INDEXED_MODELS:
+    post_save.connect(retrieval_row_saved, sender=model, dispatch_uid=f'retrieval_save_{model.__name__}')
+    post_delete.connect(retrieval_row_deleted, sender=model, dispatch_uid=f'retrieval_delete_{model.__name__}')
+
+for model in COUNTED_FILE_FIELDS:
+    pre_save.connect(release_replaced_file, sender=model, dispatch_uid=f'release_file_{model.__name__}')
+    post_delete.connect(release_deleted_file, sender=model, dispatch_uid=f'release_deleted_file_{model.__name__}')
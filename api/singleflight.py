@@ -0,0 +1,145 @@
+import asyncio
+import threading
+
+
+class FlightStats:
+    """Coalescing ratio: share of requests that rode along on another request's upstream call."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+
+    def count(self, leader):
+        with self._lock:
+            if leader:
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+    def stats(self):
+        total = self.leaders + self.followers
+        return {
+            'upstream_calls': self.leaders,
+            'coalesced': self.followers,
+            'coalescing_ratio': round(self.followers / total, 3) if total else None,
+        }
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Thread-side coalescing: while fn() runs for a key, other callers with the same
+    key wait for that result instead of making their own call.
+
+    Only pays off when sync views run concurrently (WSGI or another threaded server).
+    Under Daphne sync views take turns on one thread, so callers never overlap.
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        self.stats.count(leader)
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+class _Broadcast:
+    """One upstream stream, replayed to every subscriber from the first chunk."""
+
+    def __init__(self):
+        self.chunks = []
+        self.finished = False
+        self.error = None
+        self.changed = asyncio.Condition()
+
+    async def run(self, stream, on_finish):
+        try:
+            async for chunk in stream:
+                async with self.changed:
+                    self.chunks.append(chunk)
+                    self.changed.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            on_finish()
+            async with self.changed:
+                self.finished = True
+                self.changed.notify_all()
+
+    async def subscribe(self):
+        sent = 0
+        while True:
+            async with self.changed:
+                while sent == len(self.chunks) and not self.finished:
+                    await self.changed.wait()
+                pending, finished = self.chunks[sent:], self.finished
+            for chunk in pending:
+                yield chunk
+            sent += len(pending)
+            if finished and sent == len(self.chunks):
+                if self.error is not None:
+                    raise self.error
+                return
+
+
+class StreamFlight:
+    """
+    Event-loop side coalescing for streamed replies. The first caller for a key
+    starts the upstream stream as a task (so it outlives that caller's socket);
+    everyone asking the same thing meanwhile gets the same chunks as they arrive.
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+        self._flights = {}
+        # The event loop only keeps weak references to tasks, hold on to running streams
+        self._tasks = set()
+
+    def stream(self, key, start):
+        """
+        Returns an async iterator over the chunks for `key`, calling start() for a fresh
+        upstream stream only if none is running. Joining happens here, not on first
+        iteration, so callers that check a cache first have no await in between.
+        """
+        broadcast = self._flights.get(key)
+        leader = broadcast is None
+        if leader:
+            broadcast = self._flights[key] = _Broadcast()
+            task = asyncio.ensure_future(broadcast.run(start(), lambda: self._flights.pop(key, None)))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        self.stats.count(leader)
+        return broadcast.subscribe()
+
+
+flight_stats = FlightStats()
+answer_flight = SingleFlight(flight_stats)
+stream_flight = StreamFlight(flight_stats)
@@ -0,0 +1,65 @@
+import threading
+from .cache import combined_version
+from .renderers import dumps
+from .models import PersonalData, SkillCategory, Experience, Project, Achievement
+from .serializers import (
+    PersonalDataSerializer, SkillCategorySerializer, ExperienceSerializer,
+    ProjectSerializer, AchievementSerializer
+)
+
+# Models that make up the landing page document
+PORTFOLIO_MODELS = (PersonalData, SkillCategory, Experience, Project, Achievement)
+
+
+class PortfolioSnapshot:
+    """
+    Holds the combined landing page document as prebuilt JSON bytes.
+
+    The payload is tagged with the change stamps of PORTFOLIO_MODELS and is only
+    rebuilt when one of them moves (see signals.py), so serving it costs no queries.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._payloads = {}  # site root URL -> payload
+
+    def build(self, request=None):
+        personal_data = PersonalData.objects.first()
+        # With a request the resume URL is absolute, the same as /api/personal-data/ returns it
+        context = {'request': request}
+        data = {
+            'personal_data': PersonalDataSerializer(personal_data, context=context).data if personal_data else {},
+            'skills': SkillCategorySerializer(SkillCategory.objects.all(), many=True).data,
+            'experience': ExperienceSerializer(Experience.objects.all(), many=True).data,
+            'projects': ProjectSerializer(Project.objects.all(), many=True).data,
+            'achievements': AchievementSerializer(Achievement.objects.all(), many=True).data,
+        }
+        return dumps(data)
+
+    def _site(self, request):
+        return request.build_absolute_uri('/') if request is not None else ''
+
+    def rebuild(self, request=None):
+        with self._lock:
+            version = combined_version(*PORTFOLIO_MODELS)
+            if version != self._version:
+                self._payloads = {}
+            payload = self.build(request)
+            self._payloads[self._site(request)] = payload
+            self._version = version
+            return payload, version
+
+    def get(self, request=None):
+        """
+        Returns (payload bytes, version), rebuilding only if the models changed.
+        One payload is kept per site root the document was requested under (usually just one).
+        """
+        version = combined_version(*PORTFOLIO_MODELS)
+        payload = self._payloads.get(self._site(request))
+        if payload is not None and self._version == version:
+            return payload, version
+        return self.rebuild(request)
+
+
+portfolio_snapshot = PortfolioSnapshot()
@@ -0,0 +1,117 @@
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+# Stored names look like `<dir>/<32 hex chars of sha256>/<original file name>`
+DIGEST_LENGTH = 32
+CONTENT_ADDRESSED_RE = re.compile(rf'(^|/)[0-9a-f]{{{DIGEST_LENGTH}}}/[^/]+$')
+
+
+def is_content_addressed(name):
+    """True for hashed names and files derived from them (thumbnails, renditions)."""
+    return bool(CONTENT_ADDRESSED_RE.search(name))
+
+
+def is_immutable(name):
+    """
+    True only for the stored original, whose bytes can never change under its name.
+    Derived files share its directory but are rewritten in place (e.g. renditions rebuilt).
+    """
+    from .models import StoredFile
+
+    return is_content_addressed(name) and StoredFile.objects.filter(name=name).exists()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores each distinct file once, in a directory named after the hash of its content.
+
+    Uploads are hashed while they are streamed to a temp file; if the content is
+    already stored, the temp file is dropped and the existing object's reference
+    count goes up. delete() only removes the file once nothing references it.
+    Files written next to a hashed file (CKEditor thumbnails, image renditions) are kept as-is.
+    """
+
+    def _save(self, name, content):
+        from .models import StoredFile
+
+        if is_content_addressed(name):
+            # Derived from hashed content, so the same name always means the same bytes
+            return name if self.exists(name) else super()._save(name, content)
+
+        directory, basename = posixpath.split(name)
+        stem, ext = os.path.splitext(basename)
+        # Leave room for `<dir>/<hash>/` inside the usual 255 character name fields
+        basename = stem[:100] + ext[:20]
+
+        full_dir = self.path(directory)
+        os.makedirs(full_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=full_dir, prefix='.upload-')
+        try:
+            digest, size = hashlib.sha256(), 0
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+
+            sha256 = digest.hexdigest()
+            hash_dir = posixpath.join(directory, sha256[:DIGEST_LENGTH])
+            with transaction.atomic():
+                # Same bytes under another file name still map to the first stored copy
+                blob = StoredFile.objects.filter(sha256=sha256, name__startswith=hash_dir + '/').first()
+                if blob is None:
+                    try:
+                        with transaction.atomic():
+                            blob = StoredFile.objects.create(
+                                name=posixpath.join(hash_dir, basename), sha256=sha256, size=size
+                            )
+                    except IntegrityError:
+                        # A concurrent upload of the same file got there first, share its row
+                        blob = StoredFile.objects.get(name=posixpath.join(hash_dir, basename))
+                        StoredFile.objects.filter(pk=blob.pk).update(refcount=F('refcount') + 1)
+                else:
+                    StoredFile.objects.filter(pk=blob.pk).update(refcount=F('refcount') + 1)
+            stored_name = blob.name
+
+            full_path = self.path(stored_name)
+            if os.path.exists(full_path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                os.replace(tmp_path, full_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(full_path, self.file_permissions_mode)
+            return stored_name
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content hash, collisions are the same bytes
+        return name
+
+    def delete(self, name):
+        from .models import StoredFile
+
+        if not name:
+            return
+        with transaction.atomic():
+            if StoredFile.objects.filter(name=name, refcount__gt=1).update(refcount=F('refcount') - 1):
+                return
+            StoredFile.objects.filter(name=name).delete()
+        super().delete(name)
+
+
+def get_content_storage():
+    return content_storage
+
+
+content_storage = ContentAddressedStorage(location=settings.MEDIA_ROOT, base_url=settings.MEDIA_URL)
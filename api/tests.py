@@ -1,3 +1,64 @@
-from django.test import TestCase
+import ipaddress
+import threading
+import time
+from unittest import mock
+from django.db import close_old_connections
+from django.test import Client, TransactionTestCase
+from .models import ValentineResponse
+from .valentine_buffer import valentine_buffer
 
-# Create your tests here.
+
+class ValentineBufferStressTest(TransactionTestCase):
+    """Many threads posting to the Valentine endpoint while flushes race with them."""
+
+    threads = 16
+    ips = 300
+    rounds = 10
+
+    def test_one_row_per_ip_with_last_submission(self):
+        ips = [str(ipaddress.IPv4Address('198.18.0.1') + i) for i in range(self.ips)]
+        done = threading.Event()
+        errors = []
+
+        def client(owned):
+            # Each address belongs to one thread, so its submissions have a well-defined order
+            http = Client()
+            try:
+                for round_number in range(self.rounds):
+                    for ip in owned:
+                        response = http.post(
+                            '/api/valentine-response/',
+                            {'response': 'Yes' if round_number % 2 else 'No', 'device_model': f'round-{round_number}'},
+                            content_type='application/json',
+                            HTTP_X_FORWARDED_FOR=ip,
+                        )
+                        if response.status_code != 201:
+                            errors.append(f"{ip}: HTTP {response.status_code}")
+            finally:
+                close_old_connections()
+
+        def flusher():
+            # Flushes racing with submissions, on top of the ones the threshold triggers
+            while not done.is_set():
+                valentine_buffer.flush()
+                time.sleep(0.005)
+            close_old_connections()
+
+        workers = [threading.Thread(target=client, args=(ips[t::self.threads],)) for t in range(self.threads)]
+        flush_thread = threading.Thread(target=flusher)
+        # A low threshold forces many concurrent flushes
+        with mock.patch.object(valentine_buffer, 'flush_threshold', 25):
+            flush_thread.start()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            done.set()
+            flush_thread.join()
+            valentine_buffer.flush()
+
+        self.assertEqual(errors, [])
+        last = f'round-{self.rounds - 1}'
+        last_response = 'Yes' if (self.rounds - 1) % 2 else 'No'
+        rows = ValentineResponse.objects.values_list('ip_address', 'device_model', 'response')
+        self.assertCountEqual(rows, [(ip, last, last_response) for ip in ips])
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PersonalDataView, SkillCategoryViewSet, ExperienceViewSet, ProjectViewSet, AchievementViewSet, BlogPostViewSet, ChatBotView, ServiceQueryView, ValentineResponseView
+from .views import PersonalDataView, PortfolioView, SkillCategoryViewSet, ExperienceViewSet, ProjectViewSet, AchievementViewSet, BlogPostViewSet, ChatBotView, ServiceQueryView, ValentineResponseView
 
 router = DefaultRouter()
 router.register(r'skills', SkillCategoryViewSet)
@@ -11,6 +11,7 @@ router.register(r'blog', BlogPostViewSet)
 
 urlpatterns = [
     path('personal-data/', PersonalDataView.as_view(), name='personal-data'),
+    path('portfolio/', PortfolioView.as_view(), name='portfolio'),
     path('chatbot/', ChatBotView.as_view(), name='chatbot'),
     path('service-query/', ServiceQueryView.as_view(), name='service-query'),
     path('valentine-response/', ValentineResponseView.as_view(), name='valentine-response'),
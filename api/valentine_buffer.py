@@ -0,0 +1,107 @@
+import atexit
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_ipv46_address
+from django.db import transaction
+from django.utils.ipv6 import clean_ipv6_address
+from .write_behind import WriteBehindBuffer
+
+UPDATE_FIELDS = ['response', 'device_model', 'location', 'message']
+
+
+def normalize_ip(ip):
+    """The address as the ip_address column stores it, or None if it isn't a valid IP."""
+    if not ip:
+        return None
+    try:
+        validate_ipv46_address(ip)
+    except ValidationError:
+        return None
+    return clean_ipv6_address(ip) if ':' in ip else ip
+
+
+class ValentineBuffer(WriteBehindBuffer):
+    """
+    Write-behind buffer for ValentineResponse submissions.
+
+    Submissions only replace the pending entry for their IP (last write wins).
+    Submissions without a valid IP can't be told apart, so each is kept and inserted as its own row.
+    Pending entries are upserted with bulk_create(update_conflicts=True) on the unique
+    ip_address, `batch_size` rows per INSERT, once `flush_threshold` IPs are pending
+    or every `flush_interval` seconds, and once more when the process exits.
+    """
+
+    name = 'Valentine buffer'
+
+    def __init__(self, flush_interval=2, flush_threshold=100, batch_size=500):
+        super().__init__(flush_interval, flush_threshold)
+        self.batch_size = batch_size
+        self._pending = {}  # ip -> field values
+        self._unkeyed = []  # field values of submissions without a usable IP
+        self.submitted = 0
+        self.written = 0
+
+    def add(self, ip, **fields):
+        """Queues one submission. Returns the number of rows waiting to be written."""
+        ip = normalize_ip(ip)
+        with self._lock:
+            if ip is None:
+                self._unkeyed.append(fields)
+            else:
+                self._pending[ip] = fields
+            self.submitted += 1
+            pending = len(self._pending) + len(self._unkeyed)
+            start_flush = self._queued(pending)
+        if start_flush:
+            self._start_flush()
+        return pending
+
+    def _take(self):
+        batch, self._pending = self._pending, {}
+        unkeyed, self._unkeyed = self._unkeyed, []
+        if not batch and not unkeyed:
+            return None
+        return batch, unkeyed
+
+    def _write(self, batch):
+        """Upserts the submissions. Returns the number of rows written."""
+        from .models import ValentineResponse
+
+        keyed, unkeyed = batch
+        rows = [ValentineResponse(ip_address=ip, **fields) for ip, fields in keyed.items()]
+        rows += [ValentineResponse(ip_address=None, **fields) for fields in unkeyed]
+        # All batches or none, so rows put back after an error are never inserted twice
+        with transaction.atomic():
+            ValentineResponse.objects.bulk_create(
+                rows,
+                batch_size=self.batch_size,
+                update_conflicts=True,
+                unique_fields=['ip_address'],
+                update_fields=UPDATE_FIELDS,
+            )
+        return len(rows)
+
+    def _restore(self, batch):
+        # Put the submissions back unless a newer one for the same IP arrived meanwhile
+        keyed, unkeyed = batch
+        for ip, fields in keyed.items():
+            self._pending.setdefault(ip, fields)
+        self._unkeyed[:0] = unkeyed
+
+    def _written(self, batch, count):
+        self.written += count
+
+    def stats(self):
+        return {
+            'submitted': self.submitted,
+            'written': self.written,
+            'pending': len(self._pending) + len(self._unkeyed),
+        }
+
+
+valentine_buffer = ValentineBuffer(
+    flush_interval=getattr(settings, 'VALENTINE_FLUSH_INTERVAL', 2),
+    flush_threshold=getattr(settings, 'VALENTINE_FLUSH_THRESHOLD', 100),
+    batch_size=getattr(settings, 'VALENTINE_BATCH_SIZE', 500),
+)
+atexit.register(valentine_buffer.flush)
@@ -0,0 +1,68 @@
+import atexit
+from collections import Counter
+from django.conf import settings
+from django.db.models import Case, When, Value, F, IntegerField
+from .write_behind import WriteBehindBuffer
+
+
+class ViewCounter(WriteBehindBuffer):
+    """
+    Write-behind buffer for BlogPost view counts.
+
+    Reads only bump an in-process counter. Pending increments are written as a single
+    UPDATE once `flush_threshold` views are buffered or every `flush_interval` seconds,
+    whichever comes first, and once more when the process exits.
+    """
+
+    name = 'View counter'
+
+    def __init__(self, flush_interval=30, flush_threshold=100):
+        super().__init__(flush_interval, flush_threshold)
+        self._pending = Counter()
+        # The batch being written, still counted by hit() and pending() until its UPDATE succeeds
+        self._in_flight = Counter()
+
+    def hit(self, post_id):
+        """Records one view and returns the views for this post not yet in the database."""
+        with self._lock:
+            self._pending[post_id] += 1
+            pending = self._pending[post_id] + self._in_flight[post_id]
+            start_flush = self._queued(sum(self._pending.values()))
+        if start_flush:
+            self._start_flush()
+        return pending
+
+    def pending(self, post_id):
+        with self._lock:
+            return self._pending[post_id] + self._in_flight[post_id]
+
+    def _take(self):
+        batch, self._pending = self._pending, Counter()
+        self._in_flight = batch
+        return batch
+
+    def _write(self, batch):
+        """Applies the increments in one UPDATE. Returns the number of posts touched."""
+        from .models import BlogPost
+
+        increment = Case(
+            *[When(pk=post_id, then=Value(count)) for post_id, count in batch.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        return BlogPost.objects.filter(pk__in=batch.keys()).update(views=F('views') + increment)
+
+    def _restore(self, batch):
+        # Put the views back so the next flush retries them
+        self._pending.update(batch)
+        self._in_flight = Counter()
+
+    def _written(self, batch, count):
+        self._in_flight = Counter()
+
+
+view_counter = ViewCounter(
+    flush_interval=getattr(settings, 'BLOG_VIEW_FLUSH_INTERVAL', 30),
+    flush_threshold=getattr(settings, 'BLOG_VIEW_FLUSH_THRESHOLD', 100),
+)
+atexit.register(view_counter.flush)
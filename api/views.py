@@ -1,8 +1,4 @@
 
-import os
-from dotenv import load_dotenv
-from google import genai
-from google.genai import types
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -11,86 +7,204 @@ from django.conf import settings
 from .admin_overrides import send_brevo_query_emails
 
 from rest_framework.permissions import AllowAny
-from django.db.models import F
 from django.core.mail import send_mail
-from .models import PersonalData, SkillCategory, Experience, Project, Achievement, BlogPost, ServiceQuery, ValentineResponse
-import requests
+from django.db.models import Count
+from django.http import HttpResponse
+from django.utils import timezone
+from .models import PersonalData, SkillCategory, Experience, Project, Achievement, BlogPost, BlogPostTag, ServiceQuery
 from .serializers import (
     PersonalDataSerializer, SkillCategorySerializer, ExperienceSerializer, 
     ProjectSerializer, AchievementSerializer, BlogPostListSerializer, BlogPostDetailSerializer,
     ServiceQuerySerializer, ValentineResponseSerializer
 )
+from .snapshot import PORTFOLIO_MODELS, portfolio_snapshot
+from .conditional import ConditionalGetMixin, conditional_get
+from .cache import get_stamp
+from .view_counter import view_counter
+from .pagination import BlogPostCursorPagination
+from .search import get_search_index
+from .prompt_context import prompt_context, retrieval_enabled
+from .retrieval import retrieval_index, with_context
+from .answer_cache import answer_cache
+from .llm import get_backend
+from .singleflight import answer_flight
+from .geoip import locate
+from .valentine_buffer import valentine_buffer
+from .admission import Overloaded, chat_limiter, chat_rate_limiter, client_ip
 
-# Configure Gemini
-load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-# client initialized inside view or globally? 
-# Best to initialize lazily or globally. 
-gemini_client = genai.Client(api_key=GEMINI_API_KEY)
 
-class PersonalDataView(APIView):
+class PersonalDataView(ConditionalGetMixin, APIView):
+    conditional_models = (PersonalData,)
+
     def get(self, request):
+        return self.conditional_response(request, self.get_personal_data)
+
+    def get_personal_data(self, request):
         data = PersonalData.objects.first()
         if data:
             serializer = PersonalDataSerializer(data, context={'request': request})
             return Response(serializer.data)
         return Response({})
 
-class SkillCategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class PortfolioView(ConditionalGetMixin, APIView):
+    """
+    Returns personal data, skills, experience, projects and achievements in one document.
+    The payload is prebuilt bytes that only change when one of those models is saved.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    conditional_models = PORTFOLIO_MODELS
+
+    def get(self, request):
+        return self.conditional_response(request, self.get_snapshot)
+
+    def get_snapshot(self, request):
+        payload, version = portfolio_snapshot.get(request)
+        return HttpResponse(payload, content_type='application/json')
+
+class SkillCategoryViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = SkillCategory.objects.all()
+    conditional_models = (SkillCategory,)
     serializer_class = SkillCategorySerializer
 
-class ExperienceViewSet(viewsets.ReadOnlyModelViewSet):
+class ExperienceViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Experience.objects.all()
+    conditional_models = (Experience,)
     serializer_class = ExperienceSerializer
 
-class ProjectViewSet(viewsets.ReadOnlyModelViewSet):
+class ProjectViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Project.objects.all()
+    conditional_models = (Project,)
     serializer_class = ProjectSerializer
 
-class AchievementViewSet(viewsets.ReadOnlyModelViewSet):
+class AchievementViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Achievement.objects.all()
+    conditional_models = (Achievement,)
     serializer_class = AchievementSerializer
 
-class BlogPostViewSet(viewsets.ReadOnlyModelViewSet):
+class BlogPostViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for blog posts
-    - List: Returns all published blog posts
+    - List: Returns published blog posts, cursor paginated when asked for a page
     - Retrieve: Returns a single blog post by slug and increments view count
     - Categories: Returns list of unique categories
     """
-    queryset = BlogPost.objects.filter(status='published').order_by('-published_at')
+    queryset = BlogPost.objects.filter(status='published').order_by('-published_at', '-id')
     lookup_field = 'slug'
+    pagination_class = BlogPostCursorPagination
+    conditional_models = (BlogPost,)
+    # View counts are not stamped, so a 304 may carry a slightly older count
+    conditional_weak = True
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return BlogPostDetailSerializer
         return BlogPostListSerializer
-    
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != 'retrieve':
+            # List serializers never touch these, don't pull the HTML off disk
+            queryset = queryset.defer('content', 'meta_description', 'meta_keywords')
+        return queryset
+
+    def get_validators(self, request, *args, **kwargs):
+        if self.action != 'retrieve':
+            return super().get_validators(request, *args, **kwargs)
+        # Detail validators come from the post itself, without loading its content
+        post = self.get_queryset().filter(slug=kwargs[self.lookup_field]).values('pk', 'updated_at', 'published_at').first()
+        if post is None:
+            return None, None
+        self.post_id = post['pk']
+        changed = max(filter(None, (post['updated_at'], post['published_at'])))
+        etag = f"{post['pk']}-{format(get_stamp(BlogPost), 'x')}"
+        return etag, int(changed.timestamp())
+
     def retrieve(self, request, *args, **kwargs):
+        response = self.conditional_response(request, self.retrieve_post, *args, **kwargs)
+        if response.status_code == status.HTTP_304_NOT_MODIFIED:
+            # A revalidated read is still a read
+            view_counter.hit(self.post_id)
+        return response
+    
+    def retrieve_post(self, request, *args, **kwargs):
         instance = self.get_object()
-        # Increment view count
-        BlogPost.objects.filter(pk=instance.pk).update(views=F('views') + 1)
-        instance.refresh_from_db()
+        # Views are buffered and written in batches, report persisted + pending
+        instance.views += view_counter.hit(instance.pk)
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @conditional_get
     def categories(self, request):
         """Get all unique blog categories"""
         categories = BlogPost.objects.filter(status='published').values_list('category', flat=True).distinct()
         return Response({'categories': list(categories)})
     
     @action(detail=False, methods=['get'])
+    @conditional_get
+    def search(self, request):
+        """Full-text search over title, excerpt, content and tags"""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'q parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 20)), 50))
+        except ValueError:
+            limit = 20
+
+        hits = get_search_index().search(query, limit)
+        snippets = dict(hits)
+        posts = self.get_queryset().filter(pk__in=snippets).in_bulk()
+        results = []
+        for post_id, snippet in hits:
+            if post_id in posts:
+                item = self.get_serializer(posts[post_id]).data
+                item['snippet'] = snippet
+                results.append(item)
+        return Response({'query': query, 'results': results})
+
+    @action(detail=False, methods=['get'])
+    @conditional_get
+    def tags(self, request):
+        """Get all tags on published posts with their post counts"""
+        tags = (
+            BlogPostTag.objects.filter(post__status='published')
+            .values('tag')
+            .annotate(count=Count('post'))
+            .order_by('-count', 'tag')
+        )
+        return Response({'tags': list(tags)})
+
+    @action(detail=False, methods=['get'])
+    @conditional_get
+    def by_tag(self, request):
+        """Filter blog posts by tag"""
+        tag = request.query_params.get('tag')
+        if not tag:
+            return Response({'error': 'Tag parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        posts = self.get_queryset().filter(tag_index__tag=tag)
+        page = self.paginate_queryset(posts)
+        if page is None:
+            return Response(self.get_serializer(posts, many=True).data)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    @conditional_get
     def by_category(self, request):
         """Filter blog posts by category"""
         category = request.query_params.get('category')
         if not category:
             return Response({'error': 'Category parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        posts = self.queryset.filter(category=category)
-        serializer = self.get_serializer(posts, many=True)
-        return Response(serializer.data)
+        posts = self.get_queryset().filter(category=category)
+        page = self.paginate_queryset(posts)
+        if page is None:
+            return Response(self.get_serializer(posts, many=True).data)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 class ChatBotView(APIView):
     permission_classes = [AllowAny]
@@ -101,47 +215,47 @@ class ChatBotView(APIView):
         if not user_query:
             return Response({"error": "Query is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            # Read resume content
-            resume_path = os.path.join(settings.BASE_DIR, 'resume.txt')
-            with open(resume_path, 'r') as f:
-                resume_content = f.read()
-
-            # Construct prompt
-            system_prompt = f"""
-            You are Nance, a highly advanced AI assistant for Yugal Kishor.
-            Your persona is professional, intelligent, and helpful, similar to NANCE from Yugal Kishor.
-            You are requested to answer questions based on Yugal's resume.
-            
-            Resume Context:
-            {resume_content}
-
-            Rules:
-            1. Always answer in the persona of Nance ("Sir", "Processing", etc. are good, but keep it concise).
-            2. Only answer questions related to Yugal's professional background, skills, and resume.
-            3. If the question is unrelated, politely decline and steer back to Yugal.
-            4. Keep answers brief and to the point suitable for a chat interface.
-            """
-            
-            chat = gemini_client.chats.create(
-                model='gemini-2.5-flash', 
-                history=[
-                    types.Content(
-                        role="user", 
-                        parts=[types.Part(text=system_prompt)]
-                    ),
-                    types.Content(
-                        role="model", 
-                        parts=[types.Part(text="Hello Sir, I am online and ready to assist you with inquiries regarding Mr. Kishor's portfolio.")]
-                    )
-                ]
+        if not chat_rate_limiter.allow(client_ip(request)):
+            return Response(
+                {"error": "Too many questions, please slow down."},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={"Retry-After": str(chat_rate_limiter.retry_after())},
             )
-            
-            response = chat.send_message(user_query)
-            return Response({"response": response.text})
 
+        try:
+            # Built once and reused until its sources change
+            system_prompt, greeting, version = prompt_context.get('resume')
+            cache_key = answer_cache.key('resume', version, user_query)
+            cached = answer_cache.get(cache_key)
+            if cached:
+                return Response({"response": ''.join(cached)})
+
+            def ask():
+                # Only the caller that actually goes upstream takes a slot, coalesced callers just wait for it.
+                # Bounded so a burst of chat can't hold up the rest of the API
+                if not chat_limiter.try_acquire():
+                    raise Overloaded()
+                try:
+                    prompt = user_query
+                    if retrieval_enabled():
+                        prompt = with_context(user_query, retrieval_index.context_for(user_query))
+                    answer = get_backend().send([("user", system_prompt), ("model", greeting)], prompt)
+                finally:
+                    chat_limiter.release()
+                answer_cache.set(cache_key, [answer])
+                return answer
+
+            # Identical questions arriving together share one upstream call
+            return Response({"response": answer_flight.do(cache_key, ask)})
+
+        except Overloaded:
+            return Response(
+                {"error": "The assistant is busy, please try again shortly."},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={"Retry-After": "5"},
+            )
         except Exception as e:
-            print(f"Gemini Error: {e}")
+            print(f"Chatbot Error: {e}")
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
@@ -159,7 +273,7 @@ class ServiceQueryView(APIView):
             personal_data = PersonalData.objects.first()
             admin_email = personal_data.email if personal_data and personal_data.email else settings.DEFAULT_FROM_EMAIL
             
-            # Send emails via Brevo
+            # Queued in the outbox; a background worker talks to Brevo
             try:
                 send_brevo_query_emails(query, admin_email)
             except Exception as e:
@@ -177,40 +291,24 @@ class ValentineResponseView(APIView):
         response_type = request.data.get('response') # 'Yes' or 'No'
         device_model = request.data.get('device_model')
         message = request.data.get('message', '')
-        
-        # Get client IP
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        
-        # Get location from IP (using ip-api.com - free for non-commercial)
-        location_str = "Unknown"
-        try:
-            geo_res = requests.get(f"http://ip-api.com/json/{ip}", timeout=5).json()
-            if geo_res.get('status') == 'success':
-                location_str = f"{geo_res.get('city')}, {geo_res.get('regionName')}, {geo_res.get('country')}"
-        except Exception as e:
-            print(f"Geo IP Error: {e}")
-
-        valentine_obj, created = ValentineResponse.objects.get_or_create(
-            ip_address=ip,
-            defaults={
-                'response': response_type,
-                'device_model': device_model,
-                'location': location_str,
-                'message': message
-            }
+        if not response_type:
+            # Rejected here, a row the database refuses would hold up the whole buffered batch
+            return Response({'error': 'response is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        ip = client_ip(request)
+        # Offline lookup against the local GeoIP table (see api/geoip.py)
+        location_str = locate(ip)
+
+        # Buffered and upserted in batches, repeat clicks from one IP only keep the latest
+        valentine_buffer.add(
+            ip,
+            response=response_type,
+            device_model=device_model,
+            location=location_str,
+            message=message,
         )
-        if not created:
-            valentine_obj.response = response_type
-            valentine_obj.device_model = device_model
-            valentine_obj.location = location_str
-            valentine_obj.message = message
-            valentine_obj.save()
-        
-        # Send email via Brevo if there's a message
+
+        # Queue an email to admin if there's a message
         if message:
             try:
                 from .admin_overrides import send_valentine_message_email
@@ -218,7 +316,7 @@ class ValentineResponseView(APIView):
                     message=message,
                     location=location_str,
                     device=device_model,
-                    timestamp=valentine_obj.created_at
+                    timestamp=timezone.now()
                 )
             except Exception as e:
                 print(f"Email Error: {e}")
@@ -0,0 +1,90 @@
+import abc
+import threading
+from django.db import close_old_connections
+
+
+class WriteBehindBuffer(abc.ABC):
+    """
+    Base for in-process write-behind buffers (blog view counts, Valentine responses).
+
+    Subclasses keep their pending entries under `_lock` and call _queued() after adding
+    one. The buffer is written once `flush_threshold` entries are pending or every
+    `flush_interval` seconds, whichever comes first. A failed write is put back and
+    retried by the next flush.
+    """
+
+    name = 'Write-behind buffer'
+
+    def __init__(self, flush_interval, flush_threshold):
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+        self._flush_started = False
+
+    @abc.abstractmethod
+    def _take(self):
+        """Called under `_lock`: removes and returns the pending entries, or something falsy if there are none."""
+
+    @abc.abstractmethod
+    def _write(self, batch):
+        """Writes a batch to the database. Returns the number of rows written."""
+
+    @abc.abstractmethod
+    def _restore(self, batch):
+        """Called under `_lock` after a failed write: puts the batch back."""
+
+    def _written(self, batch, count):
+        """Called under `_lock` after a successful write."""
+
+    def _queued(self, size):
+        """Called under `_lock` after adding an entry, with the number now pending. Returns True to start a flush."""
+        if self._timer is None:
+            self._schedule()
+        # One background flush at a time, later entries are picked up by it or the next one
+        start_flush = size >= self.flush_threshold and not self._flush_started
+        if start_flush:
+            self._flush_started = True
+        return start_flush
+
+    def _start_flush(self):
+        threading.Thread(target=self._flush_in_background, daemon=True).start()
+
+    def _schedule(self):
+        self._timer = threading.Timer(self.flush_interval, self._flush_on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_on_timer(self):
+        with self._lock:
+            self._timer = None
+        self._flush_in_background()
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        finally:
+            # Background threads get their own connections, don't leak them
+            close_old_connections()
+
+    def flush(self):
+        """Writes everything pending. Returns the number of rows written."""
+        with self._flush_lock:
+            with self._lock:
+                batch = self._take()
+                self._flush_started = False
+            if not batch:
+                return 0
+            try:
+                count = self._write(batch)
+            except Exception as e:
+                print(f"{self.name} flush error: {e}")
+                with self._lock:
+                    self._restore(batch)
+                    if self._timer is None:
+                        self._schedule()
+                return 0
+            with self._lock:
+                self._written(batch, count)
+            return count
@@ -80,6 +80,21 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'config.urls'
 
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# JSON library used by api.renderers: 'orjson', 'ujson' or 'json'. None picks the fastest installed.
+API_JSON_BACKEND = None
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -109,6 +124,17 @@ DATABASES = {
     }
 }
 
+# Change stamps (api/cache.py) must be shared by every process that reads or writes the database: server
+# workers, management commands, the shell. A file cache does that on one host; point DJANGO_CACHE_DIR at a
+# directory all of them can write, or switch to Redis/Memcached when running on several hosts
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('DJANGO_CACHE_DIR', str(BASE_DIR / '.cache' / 'django')),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -161,7 +187,12 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 # CKEditor Configuration
 CKEDITOR_UPLOAD_PATH = "uploads/"
-CKEDITOR_IMAGE_BACKEND = "pillow"
+# Uploads are stored once per distinct content under uploads/<hash>/ (see api/storage.py)
+CKEDITOR_STORAGE_BACKEND = "api.storage.ContentAddressedStorage"
+CKEDITOR_RESTRICT_BY_DATE = False
+# Pillow backend that also queues a downscaled WebP copy of every upload (see api/images.py)
+CKEDITOR_IMAGE_BACKEND = "api.images.OptimizingImageBackend"
+UPLOAD_IMAGE_MAX_WIDTH = 1600
 CKEDITOR_JQUERY_URL = 'https://ajax.googleapis.com/ajax/libs/jquery/3.6.0/jquery.min.js'
 
 CKEDITOR_CONFIGS = {
@@ -210,3 +241,64 @@ else:
     EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
     EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
     DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'admin@yugalkishore14.xyz')
+
+# Blog view counter: buffered views are written every N seconds or after N views
+BLOG_VIEW_FLUSH_INTERVAL = 30
+BLOG_VIEW_FLUSH_THRESHOLD = 100
+
+# Rebuild the ui/out route manifest when a new Next.js export is written (defaults to DEBUG)
+SPA_MANIFEST_AUTORELOAD = DEBUG
+
+# Chatbot model backend: "api.llm.GeminiBackend", or "api.llm.FakeBackend" to load test without a key
+CHAT_BACKEND = os.getenv('CHAT_BACKEND', 'api.llm.GeminiBackend')
+CHAT_BACKEND_OPTIONS = {}
+
+# Send the chatbot only the top-k matching chunks of the resume, portfolio and blog instead of everything
+CHAT_RETRIEVAL = True
+CHAT_RETRIEVAL_TOP_K = 5
+
+# Websocket chat history after the pinned system prompt: "window" drops the oldest turns once
+# CHAT_HISTORY_MAX_TOKENS is reached, "compact" folds them into a note of the earlier questions
+CHAT_HISTORY_POLICY = 'window'
+CHAT_HISTORY_MAX_TOKENS = 3000
+
+# Chatbot admission control, per process: concurrent model calls, websocket callers queued behind them
+# (and for how many seconds; the REST view answers 429 at once instead), and a per-IP token bucket
+CHAT_MAX_CONCURRENT = 8
+CHAT_MAX_WAITING = 16
+CHAT_QUEUE_TIMEOUT = 10
+CHAT_RATE_PER_MINUTE = 20
+CHAT_RATE_BURST = 5
+
+# Chatbot answers to repeated questions, per process: max entries and seconds to keep them
+CHAT_ANSWER_CACHE_SIZE = 256
+CHAT_ANSWER_CACHE_TTL = 3600
+
+# Transactional email outbox (api/outbox.py): requests only queue emails, except the admin login OTP which is sent
+# directly. An in-process thread started with the server sends them (set EMAIL_OUTBOX_WORKER = False to leave it to
+# `manage.py send_outbox`), retrying with exponential backoff
+EMAIL_OUTBOX_WORKER = True
+EMAIL_OUTBOX_MAX_ATTEMPTS = 6
+EMAIL_OUTBOX_RETRY_BASE = 30
+EMAIL_OUTBOX_RETRY_MAX = 3600
+EMAIL_OUTBOX_POLL_INTERVAL = 15
+# Seconds a worker holds a claimed email before another worker may retry it
+EMAIL_OUTBOX_LEASE = 300
+# Due emails from the same sender go out together as one Brevo request (message versions), up to this many
+EMAIL_OUTBOX_BATCH_SIZE = 50
+# Keep-alive connections held by the shared Brevo client
+BREVO_POOL_SIZE = 4
+
+# Offline GeoIP table for the Valentine page (api/geoip.py): an IP2Location LITE DB3 CSV, plain or gzipped.
+# Without the file every location is recorded as "Unknown"
+GEOIP_DATABASE = os.getenv('GEOIP_DATABASE', str(BASE_DIR / 'geoip' / 'IP2LOCATION-LITE-DB3.CSV'))
+GEOIP_CACHE_SIZE = 4096
+
+# Valentine submissions are buffered per IP and upserted in batches (api/valentine_buffer.py):
+# after this many seconds or once this many IPs are pending, in INSERTs of up to VALENTINE_BATCH_SIZE rows
+VALENTINE_FLUSH_INTERVAL = 2
+VALENTINE_FLUSH_THRESHOLD = 100
+VALENTINE_BATCH_SIZE = 500
+
+# Background threads for image work (featured image renditions, CKEditor upload optimization)
+IMAGE_WORKERS = 2
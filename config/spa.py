@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+
+# Text assets worth precompressing (see `manage.py precompress_ui`)
+COMPRESSIBLE_EXTENSIONS = ('.html', '.txt', '.js', '.css', '.json', '.map', '.svg', '.xml', '.ico')
+# Content-Encoding -> sibling file suffix, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(accept_encoding):
+    """Content codings the client accepts, from an Accept-Encoding header"""
+    accepted = set()
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        q = params.strip()
+        if q.startswith('q='):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class RouteManifest:
+    """
+    Maps every URL path the Next.js export can answer to the file that answers it.
+
+    Built once by walking the export directory, so resolving a request is a dict
+    lookup instead of a handful of stat calls. With `autoreload` the manifest is
+    rebuilt when a new export lands (checked at most once per `check_interval`).
+    """
+
+    def __init__(self, root, index='index.html', autoreload=False, check_interval=1.0):
+        self.root = root
+        self.index = index
+        self.autoreload = autoreload
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._routes = None
+        self._variants = {}
+        self._stamp = None
+        self._checked_at = 0.0
+
+    def _current_stamp(self):
+        # A fresh `next build` rewrites index.html and the top level directory
+        stamp = []
+        for path in (self.root, os.path.join(self.root, self.index)):
+            try:
+                stamp.append(os.stat(path).st_mtime_ns)
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def build(self):
+        files, dir_indexes, html_pages = {}, {}, {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            rel_dir = os.path.relpath(dirpath, self.root).replace(os.sep, '/')
+            rel_dir = '' if rel_dir == '.' else rel_dir
+            for name in filenames:
+                rel = f'{rel_dir}/{name}' if rel_dir else name
+                files[rel] = rel
+                if name == self.index:
+                    # Directory match, e.g. /docs and /docs/ -> docs/index.html
+                    dir_indexes[rel_dir] = rel
+                    dir_indexes[rel_dir + '/'] = rel
+                if name.endswith('.html'):
+                    # Next.js static route, e.g. /blog and /blog/ -> blog.html
+                    route = rel[:-len('.html')]
+                    html_pages[route] = rel
+                    html_pages[route + '/'] = rel
+
+        # Precompressed siblings, e.g. app.js -> {'br': 'app.js.br', 'gzip': 'app.js.gz'}
+        variants = {}
+        for rel in files:
+            for encoding, suffix in ENCODINGS:
+                if rel.endswith(suffix) and rel[:-len(suffix)] in files:
+                    variants.setdefault(rel[:-len(suffix)], {})[encoding] = rel
+
+        # Same precedence as the old stat cascade: file, directory index, .html page
+        routes = {**html_pages, **dir_indexes, **files}
+        routes[''] = self.index
+        return routes, variants
+
+    def _refresh(self):
+        with self._lock:
+            stamp = self._current_stamp()
+            if self._routes is None or stamp != self._stamp:
+                self._routes, self._variants = self.build()
+                self._stamp = stamp
+            self._checked_at = time.monotonic()
+
+    def resolve(self, path):
+        """Returns the file to serve for `path`, falling back to the SPA index."""
+        if self._routes is None or (
+            self.autoreload and time.monotonic() - self._checked_at > self.check_interval
+        ):
+            self._refresh()
+        return self._routes.get(path, self.index)
+
+    def has_variants(self, file):
+        return file in self._variants
+
+    def negotiate(self, file, accept_encoding):
+        """Returns (file to send, content coding) for the best precompressed variant the client takes."""
+        variants = self._variants.get(file)
+        if variants:
+            accepted = accepted_encodings(accept_encoding)
+            for encoding, _ in ENCODINGS:
+                if encoding in variants and encoding in accepted:
+                    return variants[encoding], encoding
+        return file, None
@@ -23,31 +23,38 @@ admin.site.login = types.MethodType(otp_admin_login, admin.site)
 
 from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+from api.storage import is_immutable
+from django.utils.cache import patch_vary_headers
 from django.views.static import serve
-import os
+from .spa import RouteManifest
+import re
 
-def serve_react(request, path):
-    out_dir = settings.BASE_DIR / 'ui/out'
-    filepath = out_dir / path
-
-    # 1. Exact file match (e.g., /favicon.ico, /_next/static/...)
-    if path and os.path.isfile(filepath):
-        return serve(request, path, document_root=out_dir)
+# Path -> file map of the Next.js export, built on first request instead of probing the disk each time
+react_manifest = RouteManifest(
+    settings.BASE_DIR / 'ui/out',
+    autoreload=getattr(settings, 'SPA_MANIFEST_AUTORELOAD', settings.DEBUG),
+)
 
-    # 2. Directory match - look for index.html
-    if os.path.isdir(filepath):
-        index_path = os.path.join(path, 'index.html')
-        if os.path.isfile(out_dir / index_path):
-            return serve(request, index_path, document_root=out_dir)
+def serve_react(request, path):
+    # Exact file, directory index.html, Next.js `<route>.html`, then index.html for SPA routing
+    file = react_manifest.resolve(path)
+    # Prefer the .br / .gz written by `manage.py precompress_ui`; serve() sets Content-Encoding from the suffix
+    to_send, encoding = react_manifest.negotiate(file, request.headers.get('Accept-Encoding', ''))
+    response = serve(request, to_send, document_root=react_manifest.root)
 
-    # 3. Next.js static route match (e.g., /blog -> blog.html)
-    html_path = path.rstrip('/') + '.html'
-    if os.path.isfile(out_dir / html_path):
-        return serve(request, html_path, document_root=out_dir)
+    if react_manifest.has_variants(file):
+        patch_vary_headers(response, ['Accept-Encoding'])
+    if file.startswith('_next/static/'):
+        # Content-hashed by Next.js, safe to cache forever
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
 
-    # 4. Fallback to index.html for SPA routing
-    return serve(request, 'index.html', document_root=out_dir)
+def serve_media(request, path):
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    if is_immutable(path):
+        # The URL changes whenever the bytes do
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -57,7 +64,9 @@ urlpatterns = [
 
 # Serve media files in development
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media),
+    ]
 
 # Add SPA catch-all last
 urlpatterns += [
@@ -1,10 +1,10 @@
-import { getBlogPosts, getBlogPost } from '@/lib/api';
+import { getAllBlogPosts, getBlogPost } from '@/lib/api';
 import BlogPostClient from './BlogPostClient';
 
 // Generate static params for all blog posts at build time
 export async function generateStaticParams() {
     try {
-        const posts = await getBlogPosts();
+        const posts = await getAllBlogPosts();
         return posts.map((post) => ({
             slug: post.slug,
         }));
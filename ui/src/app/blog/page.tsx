@@ -4,21 +4,24 @@ import { useEffect, useState } from 'react';
 import Link from 'next/link';
 import Navbar from "@/components/Navbar";
 import Footer from "@/components/Footer";
-import { getBlogPosts } from '@/lib/api';
+import { getBlogPostsPage } from '@/lib/api';
 import { BlogPost } from '@/lib/types';
 import { Calendar, Clock, Eye, Tag, Search } from 'lucide-react';
 
 export default function BlogPage() {
     const [posts, setPosts] = useState<BlogPost[]>([]);
     const [loading, setLoading] = useState(true);
+    const [nextPage, setNextPage] = useState<string | null>(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [selectedCategory, setSelectedCategory] = useState<string>('All');
     const [searchQuery, setSearchQuery] = useState('');
 
     useEffect(() => {
         async function fetchPosts() {
             try {
-                const data = await getBlogPosts();
-                setPosts(data);
+                const page = await getBlogPostsPage();
+                setPosts(page.results);
+                setNextPage(page.next);
             } catch (error) {
                 console.error('Failed to fetch posts', error);
             } finally {
@@ -28,6 +31,18 @@ export default function BlogPage() {
         fetchPosts();
     }, []);
 
+    async function loadMore() {
+        if (!nextPage) return;
+        setLoadingMore(true);
+        try {
+            const page = await getBlogPostsPage(nextPage);
+            setPosts(current => [...current, ...page.results]);
+            setNextPage(page.next);
+        } finally {
+            setLoadingMore(false);
+        }
+    }
+
     const categories = ['All', ...Array.from(new Set(posts.map(post => post.category)))];
 
     const filteredPosts = posts.filter(post => {
@@ -180,6 +195,19 @@ export default function BlogPage() {
                             ))}
                         </div>
                     )}
+
+                    {/* Older posts load a page at a time */}
+                    {!loading && nextPage && (
+                        <div className="flex justify-center mt-12">
+                            <button
+                                onClick={loadMore}
+                                disabled={loadingMore}
+                                className="px-8 py-3 rounded-full font-medium glass text-slate-300 hover:text-white hover:border-cyan-500/50 transition-all duration-300 disabled:opacity-50"
+                            >
+                                {loadingMore ? 'Loading...' : 'Load more posts'}
+                            </button>
+                        </div>
+                    )}
                 </div>
             </div>
             <Footer />
@@ -11,7 +11,7 @@ import Achievements from "@/components/Achievements";
 import About from "@/components/About";
 import Contact from "@/components/Contact";
 import Footer from "@/components/Footer";
-import { getPersonalData, getSkills, getExperience, getProjects, getAchievements, getBlogPosts } from "@/lib/api";
+import { getPortfolio, getBlogPostsPage } from "@/lib/api";
 import type { PersonalData, Skill, Experience as ExperienceType, Project, Achievement, BlogPost } from "@/lib/types";
 
 export default function Home() {
@@ -27,21 +27,18 @@ export default function Home() {
   useEffect(() => {
     async function fetchData() {
       try {
-        const [personalDataRes, skillsRes, experienceRes, projectsRes, achievementsRes, blogPostsRes] = await Promise.all([
-          getPersonalData(),
-          getSkills(),
-          getExperience(),
-          getProjects(),
-          getAchievements(),
-          getBlogPosts(),
+        // Everything but the blog comes in one snapshot document
+        const [portfolio, blogPostsRes] = await Promise.all([
+          getPortfolio(),
+          getBlogPostsPage(),
         ]);
 
-        setPersonalData(personalDataRes);
-        setSkills(skillsRes);
-        setExperience(experienceRes);
-        setProjects(projectsRes);
-        setAchievements(achievementsRes);
-        setBlogPosts(blogPostsRes);
+        setPersonalData(portfolio.personal_data);
+        setSkills(portfolio.skills);
+        setExperience(portfolio.experience);
+        setProjects(portfolio.projects);
+        setAchievements(portfolio.achievements);
+        setBlogPosts(blogPostsRes.results);
       } catch (err) {
         console.error('Error fetching data:', err);
         setError(err instanceof Error ? err.message : 'Failed to load data');
@@ -1,4 +1,4 @@
-import { PersonalData, Skill, Experience, Project, Achievement, BlogPost } from './types';
+import { PersonalData, Skill, Experience, Project, Achievement, BlogPost, BlogPostPage, Portfolio } from './types';
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_BASE_URL;
 
@@ -20,6 +20,16 @@ export async function getPersonalData(): Promise<PersonalData> {
     return data;
 }
 
+// Personal data, skills, experience, projects and achievements in one request
+export async function getPortfolio(): Promise<Portfolio> {
+    const res = await fetch(`${API_BASE_URL}/portfolio/`, {
+        next: { revalidate: 60 }, // Cache for 60 seconds
+        signal: AbortSignal.timeout(30000), // 30 second timeout
+    });
+    if (!res.ok) throw new Error('Failed to fetch portfolio');
+    return res.json();
+}
+
 export async function getSkills(): Promise<Skill[]> {
     const res = await fetch(`${API_BASE_URL}/skills/`);
     if (!res.ok) throw new Error('Failed to fetch skills');
@@ -44,22 +54,38 @@ export async function getAchievements(): Promise<Achievement[]> {
     return res.json();
 }
 
-export async function getBlogPosts(): Promise<BlogPost[]> {
+const BLOG_PAGE_SIZE = 12;
+
+// One page of the cursor paginated blog list. Pass the previous page's `next` to get older posts.
+export async function getBlogPostsPage(url?: string | null): Promise<BlogPostPage> {
     const baseUrl = API_BASE_URL || 'http://localhost:8000/api';
 
     try {
-        const res = await fetch(`${baseUrl}/blog/`, {
+        const res = await fetch(url || `${baseUrl}/blog/?page_size=${BLOG_PAGE_SIZE}`, {
             next: { revalidate: 300 }, // Cache for 5 minutes
         });
         if (!res.ok) {
             console.error(`Failed to fetch blog posts: ${res.status}`);
-            return [];
+            return { results: [], next: null };
         }
-        return res.json();
+        const page = await res.json();
+        return { results: page.results, next: page.next };
     } catch (error) {
         console.error('Error fetching blog posts:', error);
-        return [];
+        return { results: [], next: null };
+    }
+}
+
+// Every published post, page by page. Only for build time (static params), pages load more on demand.
+export async function getAllBlogPosts(): Promise<BlogPost[]> {
+    const posts: BlogPost[] = [];
+    let page = await getBlogPostsPage();
+    posts.push(...page.results);
+    while (page.next) {
+        page = await getBlogPostsPage(page.next);
+        posts.push(...page.results);
     }
+    return posts;
 }
 
 export async function getBlogPost(slug: string): Promise<BlogPost> {
@@ -67,3 +67,15 @@ export interface BlogPost {
     meta_keywords?: string;
 }
 
+export interface BlogPostPage {
+    results: BlogPost[];
+    next: string | null;
+}
+
+export interface Portfolio {
+    personal_data: PersonalData;
+    skills: Skill[];
+    experience: Experience[];
+    projects: Project[];
+    achievements: Achievement[];
+}